@@ -1,8 +1,10 @@
+import os
 import sqlite3
+import time
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
-DB_PATH = "candidates.db"
+DB_PATH = os.getenv("DB_PATH", "candidates.db")
 
 def init_db():
     """Initialize tables and apply migrations."""
@@ -19,7 +21,9 @@ def init_db():
         sent_date TIMESTAMP,
         response TEXT,
         response_date TIMESTAMP,
-        status TEXT DEFAULT 'generated'
+        status TEXT DEFAULT 'generated',
+        campaign_id INTEGER,
+        created_date TIMESTAMP
     )
     """)
 
@@ -33,6 +37,10 @@ def init_db():
         cursor.execute("ALTER TABLE messages ADD COLUMN response_date TIMESTAMP")
     if 'status' not in columns:
         cursor.execute("ALTER TABLE messages ADD COLUMN status TEXT DEFAULT 'generated'")
+    if 'campaign_id' not in columns:
+        cursor.execute("ALTER TABLE messages ADD COLUMN campaign_id INTEGER")
+    if 'created_date' not in columns:
+        cursor.execute("ALTER TABLE messages ADD COLUMN created_date TIMESTAMP")
 
     cursor.execute("""
     CREATE TABLE IF NOT EXISTS candidates (
@@ -42,6 +50,7 @@ def init_db():
         name TEXT NOT NULL,
         skills TEXT,
         relevance_score REAL DEFAULT 0.0,
+        current_company TEXT,
         search_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )
     """)
@@ -52,20 +61,138 @@ def init_db():
         cursor.execute("ALTER TABLE candidates ADD COLUMN linkedin_id TEXT UNIQUE NOT NULL DEFAULT 'unknown'")
     if 'relevance_score' not in columns:
         cursor.execute("ALTER TABLE candidates ADD COLUMN relevance_score REAL DEFAULT 0.0")
+    if 'current_company' not in columns:
+        cursor.execute("ALTER TABLE candidates ADD COLUMN current_company TEXT")
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS embedding_cache (
+        text_hash TEXT NOT NULL,
+        model TEXT NOT NULL,
+        vector BLOB NOT NULL,
+        created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (text_hash, model)
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS candidate_embeddings (
+        linkedin_id TEXT NOT NULL,
+        model TEXT NOT NULL,
+        text_hash TEXT NOT NULL,
+        PRIMARY KEY (linkedin_id, model)
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS search_cache (
+        cache_key TEXT PRIMARY KEY,
+        search_url TEXT NOT NULL,
+        html BLOB NOT NULL,
+        profiles TEXT NOT NULL,
+        parser_version INTEGER NOT NULL,
+        size_bytes INTEGER NOT NULL,
+        created_date TIMESTAMP NOT NULL,
+        last_accessed TIMESTAMP NOT NULL
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS campaigns (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        role_desc TEXT NOT NULL,
+        cta TEXT NOT NULL,
+        filters TEXT,
+        status TEXT DEFAULT 'queued',
+        total INTEGER DEFAULT 0,
+        generated INTEGER DEFAULT 0,
+        failed INTEGER DEFAULT 0,
+        error TEXT,
+        created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        started_date TIMESTAMP,
+        finished_date TIMESTAMP
+    )
+    """)
+
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'funnel_stats'")
+    backfill_stats = cursor.fetchone() is None
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS funnel_stats (
+        day TEXT NOT NULL,
+        company TEXT NOT NULL,
+        template TEXT NOT NULL,
+        generated INTEGER DEFAULT 0,
+        sent INTEGER DEFAULT 0,
+        replied INTEGER DEFAULT 0,
+        response_seconds_sum REAL DEFAULT 0.0,
+        response_count INTEGER DEFAULT 0,
+        PRIMARY KEY (day, company, template)
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS search_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        config TEXT NOT NULL,
+        cache_mode TEXT DEFAULT 'auto',
+        status TEXT DEFAULT 'queued',
+        worker_id TEXT,
+        lease_expires REAL,
+        attempts INTEGER DEFAULT 0,
+        result TEXT,
+        error TEXT,
+        created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        finished_date TIMESTAMP
+    )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_search_jobs_status ON search_jobs (status, id)")
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS workers (
+        worker_id TEXT PRIMARY KEY,
+        hostname TEXT,
+        pid INTEGER,
+        started_date TIMESTAMP,
+        last_heartbeat REAL,
+        current_job INTEGER
+    )
+    """)
 
     conn.commit()
     conn.close()
+    if backfill_stats:
+        rebuild_funnel_stats()
+
+TEMPLATE_SQL = "CASE WHEN campaign_id IS NULL THEN 'single' ELSE 'campaign-' || campaign_id END"
+
+def _template_for(campaign_id: int | None) -> str:
+    return 'single' if campaign_id is None else f'campaign-{campaign_id}'
+
+def _bump_funnel(cursor, day: str, company: str | None, template: str, generated: int = 0, sent: int = 0,
+                 replied: int = 0, response_seconds: float = 0.0, response_count: int = 0) -> None:
+    cursor.execute(
+        """INSERT INTO funnel_stats (day, company, template, generated, sent, replied, response_seconds_sum, response_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (day, company, template) DO UPDATE SET
+            generated = generated + excluded.generated,
+            sent = sent + excluded.sent,
+            replied = replied + excluded.replied,
+            response_seconds_sum = response_seconds_sum + excluded.response_seconds_sum,
+            response_count = response_count + excluded.response_count""",
+        (day, company or '', template, generated, sent, replied, response_seconds, response_count)
+    )
 
 def save_message(candidate_id: str, candidate_name: str, current_company: str, message: str) -> int:
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
+    now = datetime.now()
     cursor.execute(
-        """INSERT INTO messages (candidate_id, candidate_name, current_company, message, status)
-        VALUES (?, ?, ?, ?, ?)""",
-        (candidate_id, candidate_name, current_company, message, 'generated')
+        """INSERT INTO messages (candidate_id, candidate_name, current_company, message, status, created_date)
+        VALUES (?, ?, ?, ?, ?, ?)""",
+        (candidate_id, candidate_name, current_company, message, 'generated', now)
     )
-    conn.commit()
     msg_id = cursor.lastrowid
+    _bump_funnel(cursor, now.date().isoformat(), current_company, _template_for(None), generated=1)
+    conn.commit()
     conn.close()
     return msg_id
 
@@ -73,10 +200,19 @@ def update_message_status(msg_id: int, status: str = 'sent') -> bool:
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     if status == 'sent':
+        now = datetime.now()
+        # Only the first acceptance counts as a send; the guarded UPDATE decides it atomically
         cursor.execute(
-            "UPDATE messages SET status = ?, sent_date = ? WHERE id = ?",
-            (status, datetime.now(), msg_id)
+            "UPDATE messages SET status = ?, sent_date = ? WHERE id = ? AND sent_date IS NULL",
+            (status, now, msg_id)
         )
+        if cursor.rowcount > 0:
+            cursor.execute("SELECT current_company, campaign_id FROM messages WHERE id = ?", (msg_id,))
+            company, campaign_id = cursor.fetchone()
+            _bump_funnel(cursor, now.date().isoformat(), company, _template_for(campaign_id), sent=1)
+        else:
+            # Keep the original sent_date: the rollup counted the send on that day
+            cursor.execute("UPDATE messages SET status = ? WHERE id = ?", (status, msg_id))
     else:
         cursor.execute("UPDATE messages SET status = ? WHERE id = ?", (status, msg_id))
     updated = cursor.rowcount > 0
@@ -87,11 +223,32 @@ def update_message_status(msg_id: int, status: str = 'sent') -> bool:
 def update_response(msg_id: int, response: str) -> bool:
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
+    now = datetime.now()
+    # Edits to an already logged response don't count as another reply; the guarded UPDATE
+    # decides which call is the first one, so concurrent logs can't both count it
     cursor.execute(
-        """UPDATE messages SET response = ?, status = ?, response_date = ? WHERE id = ?""",
-        (response, 'replied', datetime.now(), msg_id)
+        """UPDATE messages SET response = ?, status = ?, response_date = ? WHERE id = ? AND response IS NULL""",
+        (response, 'replied', now, msg_id)
     )
-    updated = cursor.rowcount > 0
+    first_reply = cursor.rowcount > 0
+    if first_reply:
+        # Same expression as rebuild_funnel_stats, so incremental and rebuilt sums agree exactly
+        cursor.execute(
+            """SELECT sent_date, current_company, campaign_id,
+            (julianday(response_date) - julianday(sent_date)) * 86400 FROM messages WHERE id = ?""",
+            (msg_id,)
+        )
+        sent_date, company, campaign_id, elapsed_seconds = cursor.fetchone()
+        response_seconds = elapsed_seconds if sent_date and response else 0.0
+        _bump_funnel(cursor, now.date().isoformat(), company, _template_for(campaign_id), replied=1,
+                     response_seconds=response_seconds, response_count=1 if sent_date and response else 0)
+    else:
+        # An edit keeps the original response_date, which the rollup's response time is based on
+        cursor.execute(
+            """UPDATE messages SET response = ?, status = ? WHERE id = ?""",
+            (response, 'replied', msg_id)
+        )
+    updated = first_reply or cursor.rowcount > 0
     conn.commit()
     conn.close()
     return updated
@@ -157,13 +314,25 @@ def save_candidates(profiles: List[Dict[str, Any]]) -> int:
         name = profile.get('name', 'Unknown')
         skills_str = ','.join(profile.get('skills', [])) if isinstance(profile.get('skills'), list) else str(profile.get('skills', ''))
         relevance_score = float(profile.get('relevance_score', 0.0))
-        cursor.execute(
-            """INSERT OR IGNORE INTO candidates (linkedin_id, profile_url, name, skills, relevance_score)
-            VALUES (?, ?, ?, ?, ?)""",
-            (linkedin_id, profile_url, name, skills_str, relevance_score)
-        )
-        if cursor.rowcount > 0:
+        current_company = profile.get('current_company')
+        cursor.execute("SELECT skills, relevance_score FROM candidates WHERE linkedin_id = ?", (linkedin_id,))
+        existing = cursor.fetchone()
+        if existing is None:
+            cursor.execute(
+                """INSERT INTO candidates (linkedin_id, profile_url, name, skills, relevance_score, current_company)
+                VALUES (?, ?, ?, ?, ?, ?)""",
+                (linkedin_id, profile_url, name, skills_str, relevance_score, current_company)
+            )
             saved_count += 1
+            continue
+        # Seen before: keep the best score and the union of skills across searches
+        skills = ','.join(dict.fromkeys(s for s in (existing[0] or '').split(',') + skills_str.split(',') if s))
+        best_score = max(existing[1] or 0.0, relevance_score)
+        if skills != existing[0] or best_score != existing[1]:
+            cursor.execute(
+                "UPDATE candidates SET skills = ?, relevance_score = ? WHERE linkedin_id = ?",
+                (skills, best_score, linkedin_id)
+            )
     conn.commit()
     conn.close()
     return saved_count
@@ -171,7 +340,7 @@ def save_candidates(profiles: List[Dict[str, Any]]) -> int:
 def get_candidates() -> List[Dict[str, Any]]:
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
-    cursor.execute("SELECT id, linkedin_id, profile_url, name, skills, relevance_score, search_date FROM candidates ORDER BY search_date DESC")
+    cursor.execute("SELECT id, linkedin_id, profile_url, name, skills, relevance_score, search_date, current_company FROM candidates ORDER BY search_date DESC")
     rows = cursor.fetchall()
     conn.close()
     return [
@@ -182,7 +351,458 @@ def get_candidates() -> List[Dict[str, Any]]:
             "name": row[3],
             "skills": row[4],
             "relevance_score": row[5],
-            "search_date": row[6]
+            "search_date": row[6],
+            "current_company": row[7]
+        }
+        for row in rows
+    ]
+
+def get_campaign_candidates(min_score: float = 0.0, company: str = '', not_contacted: bool = True, limit: int | None = None) -> List[Dict[str, Any]]:
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    query = "SELECT linkedin_id, name, skills, current_company, relevance_score FROM candidates c WHERE relevance_score >= ?"
+    params: List[Any] = [min_score]
+    if company:
+        query += " AND lower(current_company) LIKE ?"
+        params.append(f"%{company.lower()}%")
+    if not_contacted:
+        query += " AND NOT EXISTS (SELECT 1 FROM messages m WHERE m.candidate_id = c.linkedin_id)"
+    query += " ORDER BY relevance_score DESC, id"
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    conn.close()
+    return [
+        {
+            "linkedin_id": row[0],
+            "name": row[1],
+            "skills": row[2],
+            "current_company": row[3],
+            "relevance_score": row[4]
+        }
+        for row in rows
+    ]
+
+def save_messages(messages: List[Dict[str, Any]], campaign_id: int | None = None) -> int:
+    """Insert generated messages in a single transaction."""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    now = datetime.now()
+    cursor.executemany(
+        """INSERT INTO messages (candidate_id, candidate_name, current_company, message, status, campaign_id, created_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        [
+            (m['candidate_id'], m['candidate_name'], m['current_company'], m['message'], 'generated', campaign_id, now)
+            for m in messages
+        ]
+    )
+    per_company: Dict[str, int] = {}
+    for m in messages:
+        per_company[m['current_company'] or ''] = per_company.get(m['current_company'] or '', 0) + 1
+    for company, count in per_company.items():
+        _bump_funnel(cursor, now.date().isoformat(), company, _template_for(campaign_id), generated=count)
+    conn.commit()
+    conn.close()
+    return len(messages)
+
+def create_campaign(role_desc: str, cta: str, filters: str, total: int) -> int:
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO campaigns (role_desc, cta, filters, status, total) VALUES (?, ?, ?, ?, ?)",
+        (role_desc, cta, filters, 'queued', total)
+    )
+    conn.commit()
+    campaign_id = cursor.lastrowid
+    conn.close()
+    return campaign_id
+
+def update_campaign(campaign_id: int, **fields) -> None:
+    allowed = {'status', 'total', 'generated', 'failed', 'error', 'started_date', 'finished_date'}
+    updates = {k: v for k, v in fields.items() if k in allowed}
+    if not updates:
+        return
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    assignments = ', '.join(f"{k} = ?" for k in updates)
+    cursor.execute(f"UPDATE campaigns SET {assignments} WHERE id = ?", (*updates.values(), campaign_id))
+    conn.commit()
+    conn.close()
+
+def _campaign_row_to_dict(row) -> Dict[str, Any]:
+    return {
+        "id": row[0],
+        "role_desc": row[1],
+        "cta": row[2],
+        "filters": row[3],
+        "status": row[4],
+        "total": row[5],
+        "generated": row[6],
+        "failed": row[7],
+        "error": row[8],
+        "created_date": row[9],
+        "started_date": row[10],
+        "finished_date": row[11]
+    }
+
+def get_campaign(campaign_id: int) -> Dict[str, Any] | None:
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT id, role_desc, cta, filters, status, total, generated, failed, error,
+        created_date, started_date, finished_date FROM campaigns WHERE id = ?""",
+        (campaign_id,)
+    )
+    row = cursor.fetchone()
+    conn.close()
+    return _campaign_row_to_dict(row) if row else None
+
+def get_campaigns(statuses: List[str] | None = None) -> List[Dict[str, Any]]:
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    query = """SELECT id, role_desc, cta, filters, status, total, generated, failed, error,
+        created_date, started_date, finished_date FROM campaigns"""
+    params: List[Any] = []
+    if statuses:
+        query += f" WHERE status IN ({','.join('?' * len(statuses))})"
+        params.extend(statuses)
+    cursor.execute(query + " ORDER BY id DESC", params)
+    rows = cursor.fetchall()
+    conn.close()
+    return [_campaign_row_to_dict(row) for row in rows]
+
+def get_cached_embeddings(text_hashes: List[str], model: str) -> Dict[str, bytes]:
+    if not text_hashes:
+        return {}
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    found = {}
+    # Stay under SQLite's default bound-parameter limit
+    for start in range(0, len(text_hashes), 500):
+        chunk = text_hashes[start:start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(
+            f"SELECT text_hash, vector FROM embedding_cache WHERE model = ? AND text_hash IN ({placeholders})",
+            (model, *chunk)
+        )
+        found.update({row[0]: row[1] for row in cursor.fetchall()})
+    conn.close()
+    return found
+
+def save_embeddings(model: str, vectors: Dict[str, bytes]) -> None:
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT OR REPLACE INTO embedding_cache (text_hash, model, vector) VALUES (?, ?, ?)",
+        [(text_hash, model, vector) for text_hash, vector in vectors.items()]
+    )
+    conn.commit()
+    conn.close()
+
+def save_candidate_embeddings(model: str, text_hashes: Dict[str, str]) -> None:
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT OR REPLACE INTO candidate_embeddings (linkedin_id, model, text_hash) VALUES (?, ?, ?)",
+        [(linkedin_id, model, text_hash) for linkedin_id, text_hash in text_hashes.items()]
+    )
+    conn.commit()
+    conn.close()
+
+def get_candidate_embeddings_version(model: str) -> Tuple[int, int]:
+    """(row count, max rowid) of the index; INSERT OR REPLACE assigns a new rowid, so any write changes it."""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*), COALESCE(MAX(rowid), 0) FROM candidate_embeddings WHERE model = ?", (model,))
+    version = cursor.fetchone()
+    conn.close()
+    return version
+
+def get_candidate_embeddings(model: str) -> List[Tuple[str, bytes]]:
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT ce.linkedin_id, ec.vector
+        FROM candidate_embeddings ce
+        JOIN embedding_cache ec ON ec.text_hash = ce.text_hash AND ec.model = ce.model
+        WHERE ce.model = ? ORDER BY ce.linkedin_id""",
+        (model,)
+    )
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+def get_search_cache(cache_key: str) -> Dict[str, Any] | None:
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT cache_key, search_url, html, profiles, parser_version, created_date
+        FROM search_cache WHERE cache_key = ?""",
+        (cache_key,)
+    )
+    row = cursor.fetchone()
+    if row:
+        cursor.execute("UPDATE search_cache SET last_accessed = ? WHERE cache_key = ?", (datetime.now(), cache_key))
+        conn.commit()
+    conn.close()
+    if not row:
+        return None
+    return {
+        "cache_key": row[0],
+        "search_url": row[1],
+        "html": row[2],
+        "profiles": row[3],
+        "parser_version": row[4],
+        "created_date": row[5]
+    }
+
+def save_search_cache(cache_key: str, search_url: str, html: bytes, profiles: str, parser_version: int) -> None:
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    now = datetime.now()
+    cursor.execute(
+        """INSERT OR REPLACE INTO search_cache
+        (cache_key, search_url, html, profiles, parser_version, size_bytes, created_date, last_accessed)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+        (cache_key, search_url, html, profiles, parser_version, len(html) + len(profiles), now, now)
+    )
+    conn.commit()
+    conn.close()
+
+def update_search_cache_profiles(cache_key: str, profiles: str, parser_version: int) -> None:
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute(
+        """UPDATE search_cache SET profiles = ?, parser_version = ?, size_bytes = length(html) + ?
+        WHERE cache_key = ?""",
+        (profiles, parser_version, len(profiles), cache_key)
+    )
+    conn.commit()
+    conn.close()
+
+def evict_search_cache(max_bytes: int) -> int:
+    """Drop least recently used entries until the cache fits in max_bytes."""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute("SELECT cache_key, size_bytes FROM search_cache ORDER BY last_accessed DESC")
+    total = 0
+    evict = []
+    for cache_key, size_bytes in cursor.fetchall():
+        total += size_bytes
+        if total > max_bytes:
+            evict.append((cache_key,))
+    cursor.executemany("DELETE FROM search_cache WHERE cache_key = ?", evict)
+    conn.commit()
+    conn.close()
+    return len(evict)
+
+def rebuild_funnel_stats() -> int:
+    """Recompute funnel_stats from the full messages history. Returns the number of rollup rows."""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM funnel_stats")
+    upsert = """
+        ON CONFLICT (day, company, template) DO UPDATE SET
+            generated = generated + excluded.generated,
+            sent = sent + excluded.sent,
+            replied = replied + excluded.replied,
+            response_seconds_sum = response_seconds_sum + excluded.response_seconds_sum,
+            response_count = response_count + excluded.response_count"""
+    # Messages created before created_date existed fall back to their send date
+    cursor.execute(f"""
+        INSERT INTO funnel_stats (day, company, template, generated, sent, replied, response_seconds_sum, response_count)
+        SELECT COALESCE(date(created_date), date(sent_date), 'unknown'), COALESCE(current_company, ''), {TEMPLATE_SQL},
+            COUNT(*), 0, 0, 0.0, 0
+        FROM messages WHERE 1 GROUP BY 1, 2, 3 {upsert}""")
+    cursor.execute(f"""
+        INSERT INTO funnel_stats (day, company, template, generated, sent, replied, response_seconds_sum, response_count)
+        SELECT date(sent_date), COALESCE(current_company, ''), {TEMPLATE_SQL}, 0, COUNT(*), 0, 0.0, 0
+        FROM messages WHERE sent_date IS NOT NULL GROUP BY 1, 2, 3 {upsert}""")
+    cursor.execute(f"""
+        INSERT INTO funnel_stats (day, company, template, generated, sent, replied, response_seconds_sum, response_count)
+        SELECT COALESCE(date(response_date), 'unknown'), COALESCE(current_company, ''), {TEMPLATE_SQL}, 0, 0, COUNT(*),
+            COALESCE(SUM(CASE WHEN sent_date IS NOT NULL AND response_date IS NOT NULL AND response != ''
+                THEN (julianday(response_date) - julianday(sent_date)) * 86400 END), 0.0),
+            SUM(CASE WHEN sent_date IS NOT NULL AND response_date IS NOT NULL AND response != '' THEN 1 ELSE 0 END)
+        FROM messages WHERE response IS NOT NULL GROUP BY 1, 2, 3 {upsert}""")
+    cursor.execute("SELECT COUNT(*) FROM funnel_stats")
+    rows = cursor.fetchone()[0]
+    conn.commit()
+    conn.close()
+    return rows
+
+def get_funnel_totals() -> Dict[str, Any]:
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT COALESCE(SUM(generated), 0), COALESCE(SUM(sent), 0), COALESCE(SUM(replied), 0),
+        COALESCE(SUM(response_seconds_sum), 0.0), COALESCE(SUM(response_count), 0) FROM funnel_stats"""
+    )
+    row = cursor.fetchone()
+    conn.close()
+    return {
+        "generated": row[0],
+        "sent": row[1],
+        "replied": row[2],
+        "response_seconds_sum": row[3],
+        "response_count": row[4]
+    }
+
+def get_funnel_stats(group_by: str = 'day') -> List[Dict[str, Any]]:
+    if group_by not in ('day', 'company', 'template'):
+        raise ValueError(f"Cannot group funnel stats by '{group_by}'")
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""SELECT {group_by}, SUM(generated), SUM(sent), SUM(replied), SUM(response_seconds_sum), SUM(response_count)
+        FROM funnel_stats GROUP BY {group_by} ORDER BY {group_by}"""
+    )
+    rows = cursor.fetchall()
+    conn.close()
+    return [
+        {
+            group_by: row[0],
+            "generated": row[1],
+            "sent": row[2],
+            "replied": row[3],
+            "response_seconds_sum": row[4],
+            "response_count": row[5]
+        }
+        for row in rows
+    ]
+
+def enqueue_search_job(config: str, cache_mode: str = 'auto') -> int:
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO search_jobs (config, cache_mode, status) VALUES (?, ?, 'queued')", (config, cache_mode))
+    conn.commit()
+    job_id = cursor.lastrowid
+    conn.close()
+    return job_id
+
+def lease_search_job(worker_id: str, lease_seconds: float, max_attempts: int) -> Dict[str, Any] | None:
+    """Claim the oldest queued job, or one whose lease expired with a dead worker.
+
+    An expired job that already used max_attempts is failed instead, so a job that
+    keeps killing its worker is not re-leased forever.
+    """
+    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    cursor = conn.cursor()
+    now = time.time()
+    # IMMEDIATE takes the write lock up front so two workers can't claim the same row
+    cursor.execute("BEGIN IMMEDIATE")
+    cursor.execute(
+        """UPDATE search_jobs SET status = 'failed', lease_expires = NULL, finished_date = ?,
+        error = 'Lease expired after ' || attempts || ' attempts; the worker died or hung'
+        WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?""",
+        (datetime.now(), now, max_attempts)
+    )
+    if cursor.rowcount:
+        print(f"DEBUG: Failed {cursor.rowcount} search jobs whose lease expired {max_attempts} times.")
+    cursor.execute(
+        """SELECT id, config, cache_mode, attempts FROM search_jobs
+        WHERE status = 'queued' OR (status = 'leased' AND lease_expires < ? AND attempts < ?)
+        ORDER BY id LIMIT 1""",
+        (now, max_attempts)
+    )
+    row = cursor.fetchone()
+    if row:
+        cursor.execute(
+            "UPDATE search_jobs SET status = 'leased', worker_id = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+            (worker_id, now + lease_seconds, row[0])
+        )
+    cursor.execute("COMMIT")
+    conn.close()
+    if not row:
+        return None
+    return {"id": row[0], "config": row[1], "cache_mode": row[2], "attempts": row[3] + 1}
+
+def extend_search_job_lease(job_id: int, worker_id: str, lease_seconds: float) -> bool:
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    cursor = conn.cursor()
+    cursor.execute(
+        "UPDATE search_jobs SET lease_expires = ? WHERE id = ? AND worker_id = ? AND status = 'leased'",
+        (time.time() + lease_seconds, job_id, worker_id)
+    )
+    extended = cursor.rowcount > 0
+    conn.commit()
+    conn.close()
+    return extended
+
+def finish_search_job(job_id: int, worker_id: str, status: str, result: str | None = None, error: str | None = None) -> bool:
+    """Record the outcome; ignored if the lease was lost to another worker meanwhile."""
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    cursor = conn.cursor()
+    cursor.execute(
+        """UPDATE search_jobs SET status = ?, result = ?, error = ?, finished_date = ?, lease_expires = NULL
+        WHERE id = ? AND worker_id = ? AND status = 'leased'""",
+        (status, result, error, datetime.now() if status != 'queued' else None, job_id, worker_id)
+    )
+    finished = cursor.rowcount > 0
+    conn.commit()
+    conn.close()
+    return finished
+
+def get_search_job(job_id: int) -> Dict[str, Any] | None:
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT id, config, cache_mode, status, worker_id, attempts, result, error, created_date, finished_date
+        FROM search_jobs WHERE id = ?""",
+        (job_id,)
+    )
+    row = cursor.fetchone()
+    conn.close()
+    if not row:
+        return None
+    return {
+        "id": row[0],
+        "config": row[1],
+        "cache_mode": row[2],
+        "status": row[3],
+        "worker_id": row[4],
+        "attempts": row[5],
+        "result": row[6],
+        "error": row[7],
+        "created_date": row[8],
+        "finished_date": row[9]
+    }
+
+def heartbeat_worker(worker_id: str, hostname: str, pid: int, current_job: int | None) -> None:
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    cursor = conn.cursor()
+    cursor.execute(
+        """INSERT INTO workers (worker_id, hostname, pid, started_date, last_heartbeat, current_job)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (worker_id) DO UPDATE SET last_heartbeat = excluded.last_heartbeat, current_job = excluded.current_job""",
+        (worker_id, hostname, pid, datetime.now(), time.time(), current_job)
+    )
+    conn.commit()
+    conn.close()
+
+def remove_worker(worker_id: str) -> None:
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+    conn.commit()
+    conn.close()
+
+def get_workers() -> List[Dict[str, Any]]:
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute("SELECT worker_id, hostname, pid, started_date, last_heartbeat, current_job FROM workers ORDER BY worker_id")
+    rows = cursor.fetchall()
+    conn.close()
+    return [
+        {
+            "worker_id": row[0],
+            "hostname": row[1],
+            "pid": row[2],
+            "started_date": row[3],
+            "last_heartbeat": row[4],
+            "current_job": row[5]
         }
         for row in rows
     ]
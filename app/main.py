@@ -1,24 +1,33 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Literal
 import uvicorn
 from app.database import (
-    get_all_interactions, init_db, get_candidates, save_candidates,
-    update_message_status, get_messages_for_candidate, update_response
+    get_all_interactions, init_db, get_candidates,
+    update_message_status, get_messages_for_candidate, update_response, get_campaigns,
+    get_funnel_totals, get_funnel_stats, enqueue_search_job, get_search_job, get_workers
 )
 from datetime import datetime
-from statistics import mean
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.concurrency import run_in_threadpool
+import asyncio
 import csv
+import json
+import time
 from io import StringIO, BytesIO
 import os
 from dotenv import load_dotenv
-from app.nodes.search import search_linkedin
-from app.nodes.message_generator import create_and_save_message
+from app.nodes.message_generator import create_and_save_message, DEFAULT_ROLE_DESCRIPTION, DEFAULT_CTA
+from app.nodes.embeddings import semantic_enabled, find_similar_candidates
+from app.nodes.campaigns import start_campaign, campaign_progress, with_progress, resume_campaigns
 
 load_dotenv()
 
+SEARCH_WAIT_SECONDS = float(os.getenv('SEARCH_WAIT_SECONDS', '300'))
+SEARCH_POLL_SECONDS = float(os.getenv('SEARCH_POLL_SECONDS', '0.5'))
+WORKER_STALE_SECONDS = float(os.getenv('WORKER_STALE_SECONDS', '30'))
+
 app = FastAPI(title="Message Generator API")
 
 origins = ["http://localhost:3000"]
@@ -32,6 +41,10 @@ app.add_middleware(
 
 init_db()
 
+@app.on_event("startup")
+def resume_interrupted_campaigns():
+    resume_campaigns()
+
 class CandidateData(BaseModel):
     id: str
     name: str
@@ -47,10 +60,20 @@ class ResponseData(BaseModel):
 class SearchConfig(BaseModel):
     keywords: List[str] = ["AI Engineer"]
     location: str = ""
+    locations: List[str] = []
+    fan_out: bool = False
     company: str = ""
     min_exp: int = 0
     max_results: int = 10
 
+class CampaignConfig(BaseModel):
+    role_desc: str = DEFAULT_ROLE_DESCRIPTION
+    cta: str = DEFAULT_CTA
+    min_score: float = 0.0
+    company: str = ""
+    not_contacted: bool = True
+    limit: int | None = None
+
 @app.post("/generate")
 async def generate_message(data: dict):
     try:
@@ -59,6 +82,21 @@ async def generate_message(data: dict):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/campaigns")
+def create_campaign_endpoint(config: CampaignConfig):
+    return start_campaign(**config.dict())
+
+@app.get("/campaigns")
+def list_campaigns():
+    return [with_progress(c) for c in get_campaigns()]
+
+@app.get("/campaigns/{campaign_id}")
+def get_campaign_status(campaign_id: int):
+    progress = campaign_progress(campaign_id)
+    if not progress:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return progress
+
 @app.post("/accept-message/{msg_id}")
 async def accept_message(msg_id: int):
     try:
@@ -99,19 +137,11 @@ def get_all_interactions_endpoint():
 
 @app.get("/metrics")
 def get_effectiveness_metrics():
-    interactions = get_all_interactions()
-    total_sent = len(interactions)
-    total_replies = sum(1 for i in interactions if i['response'] is not None)
+    totals = get_funnel_totals()
+    total_sent = totals['generated']
+    total_replies = totals['replied']
     reply_rate = (total_replies / total_sent * 100) if total_sent > 0 else 0
-    response_times = []
-    for i in interactions:
-        if i['response'] and i['sent_date'] and i['response_date']:
-            sent_dt = datetime.fromisoformat(i['sent_date']) if isinstance(i['sent_date'], str) else i['sent_date']
-            resp_dt = datetime.fromisoformat(i['response_date']) if isinstance(i['response_date'], str) else i['response_date']
-            delta = resp_dt - sent_dt
-            days = delta.total_seconds() / (24 * 3600)
-            response_times.append(days)
-    avg_response_time = mean(response_times) if response_times else 0
+    avg_response_time = (totals['response_seconds_sum'] / totals['response_count'] / (24 * 3600)) if totals['response_count'] else 0
     return {
         "total_messages_sent": total_sent,
         "total_replies": total_replies,
@@ -119,6 +149,14 @@ def get_effectiveness_metrics():
         "avg_response_time_days": round(avg_response_time, 1)
     }
 
+@app.get("/funnel")
+def get_funnel(group_by: Literal['day', 'company', 'template'] = 'day'):
+    rows = get_funnel_stats(group_by)
+    for r in rows:
+        r['reply_rate_percent'] = round(r['replied'] / r['generated'] * 100, 1) if r['generated'] else 0
+        r['avg_response_time_days'] = round(r['response_seconds_sum'] / r['response_count'] / (24 * 3600), 1) if r['response_count'] else 0
+    return rows
+
 @app.get("/export-report")
 def export_report():
     interactions = get_all_interactions()
@@ -154,27 +192,88 @@ def export_report():
         headers={"Content-Disposition": f"attachment; filename=candidate-report-{datetime.now().strftime('%Y-%m-%d')}.csv"}
     )
 
+def search_job_response(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "job_id": job['id'],
+        "status": job['status'],
+        "attempts": job['attempts'],
+        "worker_id": job['worker_id'],
+        "error": job['error'],
+        "created_date": job['created_date'],
+        "finished_date": job['finished_date']
+    }
+
 @app.post("/search")
-def perform_search(config: SearchConfig):
-    try:
-        config_dict = config.dict()
-        if config.max_results:
-            config_dict['max_results'] = config.max_results
-        profiles = search_linkedin(config_dict)
-        saved_count = save_candidates(profiles)
-        all_candidates = get_candidates()
-        return {
-            "profiles_found": profiles,
-            "saved_to_db": saved_count,
-            "total_candidates": len(all_candidates),
-            "candidates": all_candidates
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}. Check .env creds, CAPTCHA, or LinkedIn access.")
+async def perform_search(config: SearchConfig, cache: Literal['auto', 'only', 'refresh'] = 'auto', wait: bool = True):
+    """Queue the search for a scraper worker (python -m app.worker). With wait=true the request
+    waits (without holding a server thread) until the job finishes or SEARCH_WAIT_SECONDS pass,
+    then falls back to a 202 with the job id to poll at /search-jobs/{job_id}."""
+    config_dict = config.dict()
+    if config.max_results:
+        config_dict['max_results'] = config.max_results
+    # SQLite calls run off the event loop: a worker holding the write lock can block them for seconds
+    job_id = await run_in_threadpool(enqueue_search_job, json.dumps(config_dict), cache)
+    deadline = time.time() + SEARCH_WAIT_SECONDS if wait else 0
+    job = await run_in_threadpool(get_search_job, job_id)
+    while job['status'] in ('queued', 'leased') and time.time() < deadline:
+        await asyncio.sleep(SEARCH_POLL_SECONDS)
+        job = await run_in_threadpool(get_search_job, job_id)
+
+    if job['status'] in ('queued', 'leased'):
+        return JSONResponse(status_code=202, content=search_job_response(job))
+    if job['status'] == 'cache_miss':
+        raise HTTPException(status_code=404, detail=job['error'])
+    if job['status'] == 'failed':
+        raise HTTPException(status_code=500, detail=f"Search failed: {job['error']}. Check .env creds, CAPTCHA, or LinkedIn access.")
+    result = json.loads(job['result'])
+    all_candidates = await run_in_threadpool(get_candidates)
+    return {
+        "job_id": job_id,
+        "profiles_found": result['profiles'],
+        "failed_queries": result['failed_queries'],
+        "saved_to_db": result['saved_to_db'],
+        "total_candidates": len(all_candidates),
+        "candidates": all_candidates
+    }
+
+@app.get("/search-jobs/{job_id}")
+def get_search_job_status(job_id: int):
+    job = get_search_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Search job not found")
+    response = search_job_response(job)
+    if job['status'] == 'done':
+        result = json.loads(job['result'])
+        response['profiles_found'] = result['profiles']
+        response['failed_queries'] = result['failed_queries']
+        response['saved_to_db'] = result['saved_to_db']
+    return response
+
+@app.get("/workers")
+def list_workers():
+    workers = get_workers()
+    now = time.time()
+    for w in workers:
+        w['seconds_since_heartbeat'] = round(now - w['last_heartbeat'], 1) if w['last_heartbeat'] else None
+        w['alive'] = w['seconds_since_heartbeat'] is not None and w['seconds_since_heartbeat'] < WORKER_STALE_SECONDS
+    return workers
 
 @app.get("/candidates")
 def list_candidates():
     return get_candidates()
 
+@app.get("/candidates/{linkedin_id}/similar")
+def similar_candidates(linkedin_id: str, limit: int = 10):
+    if not semantic_enabled():
+        raise HTTPException(status_code=503, detail="Semantic scoring is disabled. Set USE_SEMANTIC_SCORING=true and install sentence-transformers.")
+    matches = find_similar_candidates(linkedin_id, limit)
+    if matches is None:
+        raise HTTPException(status_code=404, detail="Candidate has no embedding yet")
+    candidates_by_id = {c['linkedin_id']: c for c in get_candidates()}
+    return [
+        {**candidates_by_id[match_id], "similarity": similarity}
+        for match_id, similarity in matches if match_id in candidates_by_id
+    ]
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,132 @@
+# Bulk message generation for every candidate matching a filter, run in the background
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any
+from dotenv import load_dotenv
+
+from app.database import (
+    get_campaign_candidates, save_messages, create_campaign, update_campaign, get_campaign, get_campaigns
+)
+from app.nodes.message_generator import generate_personalized_message, DEFAULT_ROLE_DESCRIPTION, DEFAULT_CTA
+
+load_dotenv()
+
+CAMPAIGN_WORKERS = int(os.getenv('CAMPAIGN_WORKERS', '4'))
+CAMPAIGN_BATCH_SIZE = int(os.getenv('CAMPAIGN_BATCH_SIZE', '50'))
+
+# Campaigns run one at a time; each one fans generation out to CAMPAIGN_WORKERS threads
+_runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix='campaign')
+
+
+def candidate_to_message_input(candidate: Dict[str, Any]) -> Dict[str, Any]:
+    # Same shape MessageGenerator.jsx posts to /generate
+    return {
+        'id': candidate['linkedin_id'],
+        'name': candidate['name'],
+        'experience': f"AI Engineer based on skills: {candidate['skills']}",
+        'current_company': candidate['current_company'] or 'N/A'
+    }
+
+
+def _generate_one(candidate: Dict[str, Any], role_desc: str, cta: str) -> Dict[str, Any] | None:
+    data = candidate_to_message_input(candidate)
+    try:
+        message = generate_personalized_message(data, role_desc, cta)
+    except Exception as e:
+        print(f"DEBUG: Campaign generation failed for {data['id']}: {e}")
+        return None
+    return {
+        'candidate_id': data['id'],
+        'candidate_name': data['name'],
+        'current_company': data['current_company'],
+        'message': message
+    }
+
+
+def run_campaign(campaign_id: int) -> None:
+    try:
+        _run_campaign(campaign_id)
+    except Exception as e:
+        print(f"DEBUG: Campaign {campaign_id} failed: {e}")
+        update_campaign(campaign_id, status='failed', error=str(e), finished_date=datetime.now())
+
+
+def _run_campaign(campaign_id: int) -> None:
+    campaign = get_campaign(campaign_id)
+    filters = json.loads(campaign['filters'] or '{}')
+    # A campaign resumed after a restart keeps its generated count. Candidates that failed
+    # have no message, so not_contacted selects them again and they are retried
+    generated, failed = campaign['generated'], 0
+    limit_reached = False
+    if filters.get('limit'):
+        filters['limit'] -= generated
+        limit_reached = filters['limit'] <= 0
+    # Re-resolve the filter at start so a queued campaign skips candidates contacted meanwhile
+    candidates = [] if limit_reached else get_campaign_candidates(**filters)
+    update_campaign(campaign_id, status='running', total=generated + len(candidates), failed=failed,
+                    started_date=campaign['started_date'] or datetime.now())
+    print(f"DEBUG: Campaign {campaign_id} started for {len(candidates)} candidates.")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CAMPAIGN_WORKERS) as pool:
+        for offset in range(0, len(candidates), CAMPAIGN_BATCH_SIZE):
+            batch = candidates[offset:offset + CAMPAIGN_BATCH_SIZE]
+            results = list(pool.map(lambda c: _generate_one(c, campaign['role_desc'], campaign['cta']), batch))
+            messages = [r for r in results if r is not None]
+            generated += save_messages(messages, campaign_id)
+            failed += len(batch) - len(messages)
+            update_campaign(campaign_id, generated=generated, failed=failed)
+            print(f"DEBUG: Campaign {campaign_id}: {offset + len(batch)}/{len(candidates)} processed "
+                  f"({(offset + len(batch)) / max(time.perf_counter() - start, 1e-6):.1f} candidates/s).")
+    update_campaign(campaign_id, status='completed', finished_date=datetime.now())
+
+
+def start_campaign(role_desc: str = DEFAULT_ROLE_DESCRIPTION, cta: str = DEFAULT_CTA, min_score: float = 0.0,
+                   company: str = '', not_contacted: bool = True, limit: int | None = None) -> Dict[str, Any]:
+    filters = {'min_score': min_score, 'company': company, 'not_contacted': not_contacted, 'limit': limit}
+    matched = len(get_campaign_candidates(**filters))
+    campaign_id = create_campaign(role_desc, cta, json.dumps(filters), matched)
+    _runner.submit(run_campaign, campaign_id)
+    return campaign_progress(campaign_id)
+
+
+def resume_campaigns() -> None:
+    """Pick up campaigns a previous API process left queued or running.
+
+    A running campaign only resumes when it skips contacted candidates; otherwise
+    re-resolving its filter would message the already-processed ones again.
+    """
+    for campaign in reversed(get_campaigns(['queued', 'running'])):
+        filters = json.loads(campaign['filters'] or '{}')
+        if campaign['status'] == 'running' and not filters.get('not_contacted'):
+            update_campaign(campaign['id'], status='failed', error='Interrupted by an API restart',
+                            finished_date=datetime.now())
+            print(f"DEBUG: Campaign {campaign['id']} was interrupted and cannot resume safely.")
+            continue
+        print(f"DEBUG: Resuming campaign {campaign['id']} ({campaign['status']}).")
+        _runner.submit(run_campaign, campaign['id'])
+
+
+def with_progress(campaign: Dict[str, Any]) -> Dict[str, Any]:
+    """Add progress_percent and messages_per_second to a campaign row."""
+    processed = campaign['generated'] + campaign['failed']
+    throughput = 0.0
+    if campaign['started_date']:
+        started = datetime.fromisoformat(campaign['started_date']) if isinstance(campaign['started_date'], str) else campaign['started_date']
+        finished = campaign['finished_date']
+        if finished:
+            finished = datetime.fromisoformat(finished) if isinstance(finished, str) else finished
+        elapsed = ((finished or datetime.now()) - started).total_seconds()
+        throughput = campaign['generated'] / elapsed if elapsed > 0 else 0.0
+    campaign['filters'] = json.loads(campaign['filters'] or '{}')
+    campaign['progress_percent'] = round(processed / campaign['total'] * 100, 1) if campaign['total'] else 100.0
+    campaign['messages_per_second'] = round(throughput, 2)
+    return campaign
+
+
+def campaign_progress(campaign_id: int) -> Dict[str, Any] | None:
+    campaign = get_campaign(campaign_id)
+    return with_progress(campaign) if campaign else None
@@ -0,0 +1,176 @@
+# Semantic keyword scoring and candidate similarity (local CPU embedding model)
+import os
+import importlib.util
+import hashlib
+import time
+from typing import List, Dict, Any, Optional, Tuple
+from dotenv import load_dotenv
+
+from app.database import (
+    get_cached_embeddings, save_embeddings, save_candidate_embeddings, get_candidate_embeddings,
+    get_candidate_embeddings_version
+)
+
+load_dotenv()
+
+USE_SEMANTIC_SCORING = os.getenv('USE_SEMANTIC_SCORING', 'false').lower() == 'true'
+# A model name from the local Hugging Face cache or a path to a downloaded model dir
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '16'))
+SEMANTIC_BUDGET_MS = int(os.getenv('SEMANTIC_BUDGET_MS', '750'))
+SEMANTIC_FULL_THRESHOLD = float(os.getenv('SEMANTIC_FULL_THRESHOLD', '0.6'))
+SEMANTIC_PARTIAL_THRESHOLD = float(os.getenv('SEMANTIC_PARTIAL_THRESHOLD', '0.45'))
+
+# numpy/sentence-transformers are optional, same as transformers/torch for GPT-2.
+# sentence-transformers (and torch) is only imported when the model is first needed.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+EMBEDDINGS_AVAILABLE = np is not None and importlib.util.find_spec('sentence_transformers') is not None
+
+_model = None
+# Moving average of encode time per text, used to size batches against the budget
+_ms_per_text: float | None = None
+# (version, ids, matrix); workers write the index in other processes, so it is checked on every lookup
+_index: Tuple[Tuple[int, int], List[str], Any] | None = None
+
+
+def semantic_enabled() -> bool:
+    return USE_SEMANTIC_SCORING and EMBEDDINGS_AVAILABLE
+
+
+def get_model():
+    """Load the embedding model once, on CPU, without touching the network."""
+    global _model
+    if _model is None:
+        from sentence_transformers import SentenceTransformer
+        _model = SentenceTransformer(EMBEDDING_MODEL, device='cpu', local_files_only=True)
+        print(f"DEBUG: Loaded embedding model '{EMBEDDING_MODEL}' on CPU.")
+    return _model
+
+
+def text_hash(text: str) -> str:
+    normalized = ' '.join(text.lower().split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def embed_texts(texts: List[str], budget_ms: int | None = None, cache_only: bool = False) -> List[Optional[Any]]:
+    """Return one normalized vector per text, or None for texts not encoded within the budget.
+
+    Vectors are looked up in the persistent cache first; only misses are encoded,
+    in batches, and written back after each batch. Loading the model is not counted
+    against the budget, and each batch is shrunk to what the measured per-text cost
+    says still fits, so a batch never starts that would overrun it.
+    cache_only=True skips encoding: misses come back as None.
+    """
+    global _ms_per_text
+    start = time.perf_counter()
+    hashes = [text_hash(t) for t in texts]
+    unique = list(dict.fromkeys(hashes))
+    cached = get_cached_embeddings(unique, EMBEDDING_MODEL)
+    vectors = {h: np.frombuffer(blob, dtype=np.float32) for h, blob in cached.items()}
+
+    text_by_hash = dict(zip(hashes, texts))
+    pending = [] if cache_only else [h for h in unique if h not in vectors]
+    if pending:
+        # The first call in a process pays for loading the model; that is not encoding time
+        load_start = time.perf_counter()
+        get_model()
+        start += time.perf_counter() - load_start
+
+    offset = 0
+    while offset < len(pending):
+        size = EMBEDDING_BATCH_SIZE
+        if budget_ms is not None:
+            remaining_ms = budget_ms - (time.perf_counter() - start) * 1000
+            # Without a measurement yet, encode a single text to get one
+            size = 1 if _ms_per_text is None else min(size, int(remaining_ms // _ms_per_text))
+            if remaining_ms <= 0 or size < 1:
+                print(f"DEBUG: Embedding budget exhausted ({budget_ms - remaining_ms:.0f}ms of {budget_ms}ms), "
+                      f"{len(pending) - offset} texts left unencoded.")
+                break
+        batch = pending[offset:offset + size]
+        batch_start = time.perf_counter()
+        encoded = get_model().encode(
+            [text_by_hash[h] for h in batch],
+            batch_size=EMBEDDING_BATCH_SIZE,
+            normalize_embeddings=True,
+            convert_to_numpy=True
+        ).astype(np.float32)
+        batch_ms = (time.perf_counter() - batch_start) * 1000 / len(batch)
+        _ms_per_text = batch_ms if _ms_per_text is None else 0.7 * _ms_per_text + 0.3 * batch_ms
+        new_vectors = dict(zip(batch, encoded))
+        save_embeddings(EMBEDDING_MODEL, {h: v.tobytes() for h, v in new_vectors.items()})
+        vectors.update(new_vectors)
+        offset += len(batch)
+
+    print(f"DEBUG: Embedded {len(texts)} texts ({len(cached)} cached) in {(time.perf_counter() - start) * 1000:.0f}ms.")
+    return [vectors.get(h) for h in hashes]
+
+
+def keyword_similarities(keywords: str, descriptions: List[str], budget_ms: int = SEMANTIC_BUDGET_MS) -> List[Optional[float]]:
+    """Cosine similarity between the keyword phrase and each description, None when unavailable."""
+    if not semantic_enabled() or not descriptions:
+        return [None] * len(descriptions)
+    try:
+        vectors = embed_texts([keywords] + descriptions, budget_ms=budget_ms)
+    except Exception as e:
+        print(f"DEBUG: Semantic scoring failed: {e}. Using literal keyword matching.")
+        return [None] * len(descriptions)
+    query_vec = vectors[0]
+    if query_vec is None:
+        return [None] * len(descriptions)
+    return [float(np.dot(query_vec, v)) if v is not None else None for v in vectors[1:]]
+
+
+def semantic_keyword_points(similarity: float | None) -> int:
+    if similarity is None:
+        return 0
+    if similarity >= SEMANTIC_FULL_THRESHOLD:
+        return 50
+    if similarity >= SEMANTIC_PARTIAL_THRESHOLD:
+        return 25
+    return 0
+
+
+def index_candidates(descriptions: Dict[str, str]) -> None:
+    """Record the embedded description of each candidate (linkedin_id -> text) for similarity lookups."""
+    if not semantic_enabled() or not descriptions:
+        return
+    # Only reuse vectors cached during scoring; anything skipped by the page budget stays unindexed
+    ids = list(descriptions.keys())
+    vectors = embed_texts([descriptions[i] for i in ids], cache_only=True)
+    save_candidate_embeddings(EMBEDDING_MODEL, {
+        linkedin_id: text_hash(descriptions[linkedin_id])
+        for linkedin_id, vec in zip(ids, vectors) if vec is not None
+    })
+
+
+def _load_index() -> Tuple[List[str], Any]:
+    global _index
+    version = get_candidate_embeddings_version(EMBEDDING_MODEL)
+    if _index is None or _index[0] != version:
+        rows = get_candidate_embeddings(EMBEDDING_MODEL)
+        ids = [row[0] for row in rows]
+        matrix = np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows]) if rows else np.zeros((0, 0), dtype=np.float32)
+        _index = (version, ids, matrix)
+    return _index[1], _index[2]
+
+
+def find_similar_candidates(linkedin_id: str, limit: int = 10) -> List[Tuple[str, float]] | None:
+    """Brute-force cosine search over indexed candidates. Returns None if the candidate is not indexed."""
+    ids, matrix = _load_index()
+    if linkedin_id not in ids:
+        return None
+    query = matrix[ids.index(linkedin_id)]
+    scores = matrix @ query
+    ranked = np.argsort(-scores)
+    results = []
+    for idx in ranked:
+        if ids[idx] == linkedin_id:
+            continue
+        results.append((ids[idx], round(float(scores[idx]), 4)))
+        if len(results) >= limit:
+            break
+    return results
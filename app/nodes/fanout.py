@@ -0,0 +1,162 @@
+# Multi-query search: one boolean search per keyword variant and location, run on a pool of sessions
+import os
+import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable
+from dotenv import load_dotenv
+
+from app.database import init_db, save_candidates
+from app.nodes.search import create_driver, fetch_search_page, run_search
+from app.nodes.search_cache import SearchCacheMiss
+
+load_dotenv()
+
+SEARCH_SESSIONS = int(os.getenv('SEARCH_SESSIONS', '2'))
+
+
+class DriverPool:
+    """At most `size` logged-in browser sessions, created on first use and shared between queries."""
+
+    def __init__(self, size: int, factory: Callable = create_driver):
+        self.size = max(1, size)
+        self.factory = factory
+        self._idle = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if not can_create:
+            return self._idle.get()
+        try:
+            return self.factory()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def release(self, driver, broken: bool = False):
+        if broken:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put(driver)
+
+    def fetch(self, search_url: str, debug_tag: str = '') -> str:
+        driver = self.acquire()
+        try:
+            html = fetch_search_page(driver, search_url, debug_tag)
+        except Exception:
+            self.release(driver, broken=True)
+            raise
+        self.release(driver)
+        return html
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().quit()
+            except queue.Empty:
+                break
+            except Exception as e:
+                print(f"DEBUG: Error closing browser session: {e}")
+
+
+def expand_search_configs(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """One config per (keyword variant, location) pair, preserving the rest of the filters."""
+    keywords = [k.strip() for k in config.get('keywords', ['AI Engineer']) if k.strip()] or ['AI Engineer']
+    locations = [l.strip() for l in config.get('locations', []) if l.strip()] or [config.get('location', '')]
+    variants = []
+    for keyword in dict.fromkeys(keywords):
+        for location in dict.fromkeys(locations):
+            variant = {k: v for k, v in config.items() if k != 'locations'}
+            variant['keywords'] = [keyword]
+            variant['location'] = location
+            variants.append(variant)
+    return variants
+
+
+def merge_profiles(results: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Dedup by linkedin_id, keeping each candidate's best-scoring hit.
+
+    Ranking is by best relevance score, then by how many queries surfaced the candidate.
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for profiles in results:
+        for profile in profiles:
+            linkedin_id = profile.get('id') or profile.get('linkedin_id')
+            existing = merged.get(linkedin_id)
+            if existing is None:
+                merged[linkedin_id] = {**profile, 'matched_queries': 1}
+                continue
+            hits = existing['matched_queries'] + 1
+            skills = list(dict.fromkeys(existing.get('skills', []) + profile.get('skills', [])))
+            if profile['relevance_score'] > existing['relevance_score']:
+                existing = {**profile}
+            merged[linkedin_id] = {**existing, 'skills': skills, 'matched_queries': hits}
+    ranked = list(merged.values())
+    ranked.sort(key=lambda p: (p['relevance_score'], p['matched_queries']), reverse=True)
+    return ranked
+
+
+def fanout_search(config: Dict[str, Any], cache_mode: str = 'auto', sessions: int = SEARCH_SESSIONS,
+                  fetch_page: Callable[[str], str] | None = None, save: bool = True) -> Dict[str, Any]:
+    """Run every expanded query concurrently and merge the results.
+
+    Returns {'profiles': [...], 'failed_queries': [{'keywords', 'location', 'error'}]}; individual
+    queries may fail as long as one succeeds. If none does, raises SearchCacheMiss when every
+    query was a cache miss, otherwise RuntimeError with the errors.
+    fetch_page(search_url) -> html replaces the browser pool, e.g. to serve local fixture pages.
+    Only the merged ranking is saved, so each candidate is stored with its best score and all skills.
+    """
+    init_db()
+    variants = expand_search_configs(config)
+    workers = max(1, min(sessions, len(variants)))
+    print(f"DEBUG: Fan-out search: {len(variants)} queries on {workers} sessions.")
+    pool = DriverPool(workers) if fetch_page is None else None
+
+    def run_variant(index: int, variant: Dict[str, Any]) -> List[Dict[str, Any]] | Exception | None:
+        fetch = fetch_page or (lambda url: pool.fetch(url, debug_tag=str(index)))
+        try:
+            return run_search(variant, fetch, cache_mode, save=False)
+        except SearchCacheMiss:
+            return None
+        except Exception as e:
+            print(f"DEBUG: Fan-out query {index} ({variant['keywords'][0]!r}, {variant['location']!r}) failed: {e}")
+            return e
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run_variant, range(len(variants)), variants))
+    finally:
+        if pool:
+            pool.close()
+
+    succeeded = [r for r in results if isinstance(r, list)]
+    failed_queries = [
+        {'keywords': variant['keywords'][0], 'location': variant['location'], 'error': str(r)}
+        for variant, r in zip(variants, results) if isinstance(r, Exception)
+    ]
+    if not succeeded:
+        if not failed_queries:
+            raise SearchCacheMiss("No cached results for any query in this search")
+        errors = '; '.join(f"{f['keywords']!r}/{f['location']!r}: {f['error']}" for f in failed_queries)
+        raise RuntimeError(f"All {len(failed_queries)} fan-out queries failed ({errors})")
+    merged = merge_profiles(succeeded)
+    print(f"DEBUG: Fan-out merged {sum(len(r) for r in succeeded)} hits into {len(merged)} candidates"
+          f"{f', {len(failed_queries)} queries failed' if failed_queries else ''}.")
+    if save:
+        print(f"DEBUG: Saved {save_candidates(merged)} new candidates to database.")
+    return {'profiles': merged, 'failed_queries': failed_queries}
@@ -1,4 +1,6 @@
 import os
+import importlib.util
+import threading
 from typing import Dict, Any
 from dotenv import load_dotenv
 
@@ -18,17 +20,23 @@ else:
 
 from app.database import save_message, get_messages_for_candidate
 
-# GPT-2 import and loading (lazy, only if transformers/torch available)
-try:
-    from transformers import GPT2LMHeadModel, GPT2Tokenizer
-    import torch
-    tokenizer = GPT2Tokenizer.from_pretrained("gpt2")
-    model = GPT2LMHeadModel.from_pretrained("gpt2")
-    GPT2_AVAILABLE = True
-except ImportError:
-    tokenizer = None
-    model = None
-    GPT2_AVAILABLE = False
+# GPT-2 is loaded on first use (only if transformers/torch are installed) so importing
+# this module doesn't pull torch into the API process at startup
+GPT2_AVAILABLE = importlib.util.find_spec("transformers") is not None and importlib.util.find_spec("torch") is not None
+tokenizer = None
+model = None
+_gpt2_lock = threading.Lock()
+
+
+def load_gpt2():
+    global tokenizer, model
+    with _gpt2_lock:
+        if model is None:
+            from transformers import GPT2LMHeadModel, GPT2Tokenizer
+            tokenizer = GPT2Tokenizer.from_pretrained("gpt2")
+            model = GPT2LMHeadModel.from_pretrained("gpt2")
+    return tokenizer, model
+
 
 DEFAULT_ROLE_DESCRIPTION = "AI Engineer role at our innovative startup, focusing on ML pipelines and computer vision."
 DEFAULT_CTA = "Please reply if interested in discussing this opportunity further."
@@ -72,6 +80,7 @@ def generate_personalized_message_openai(candidate_data: Dict[str, Any], role_de
 def generate_personalized_message_gpt2(candidate_data: Dict[str, Any], role_desc: str = DEFAULT_ROLE_DESCRIPTION, cta: str = DEFAULT_CTA) -> str:
     if not GPT2_AVAILABLE:
         return generate_mock_message(candidate_data, role_desc, cta)
+    tokenizer, model = load_gpt2()
     name = candidate_data.get('name', 'Candidate')
     experience = candidate_data.get('experience', 'experienced AI engineer')
     company = candidate_data.get('current_company', 'a leading tech firm')
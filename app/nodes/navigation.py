@@ -0,0 +1,187 @@
+# Browser navigation: tuned headless Chrome, CDP resource blocking, adaptive DOM/network-idle waits
+import os
+import json
+import time
+from collections import deque
+from typing import List, Dict, Any, Tuple, Callable
+from dotenv import load_dotenv
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+load_dotenv()
+
+CHROME_HEADLESS = os.getenv('CHROME_HEADLESS', 'true').lower() == 'true'
+BLOCK_RESOURCES = os.getenv('BLOCK_RESOURCES', 'true').lower() == 'true'
+WAIT_MIN_SECONDS = float(os.getenv('WAIT_MIN_SECONDS', '2'))
+WAIT_MAX_SECONDS = float(os.getenv('WAIT_MAX_SECONDS', '30'))
+NETWORK_IDLE_MS = int(os.getenv('NETWORK_IDLE_MS', '500'))
+
+# Matched by Chrome against every request URL (Network.setBlockedURLs wildcards)
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp',
+    '*.mp4', '*.webm', '*.m3u8', '*.mp3', '*.ogg',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*media.licdn.com/dms/image*', '*static.licdn.com/*/fonts/*',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*px.ads.linkedin.com*', '*snap.licdn.com*', '*bat.bing.com*'
+]
+
+CHROME_FLAGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-blink-features=AutomationControlled",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-sync",
+    "--disable-default-apps",
+    "--disable-features=Translate,MediaRouter,OptimizationHints",
+    "--no-first-run",
+    "--mute-audio",
+    "--window-size=1366,900"
+]
+
+_page_stats: deque = deque(maxlen=200)
+
+
+class AdaptiveTimeout:
+    """Timeout per page kind derived from recent load times: twice the p90, clamped to [min, max].
+
+    Starts at max until enough samples exist; timeouts are recorded at their full length so a
+    run of slow pages pushes the budget back up.
+    """
+
+    def __init__(self, min_seconds: float = WAIT_MIN_SECONDS, max_seconds: float = WAIT_MAX_SECONDS, window: int = 20):
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.samples: Dict[str, deque] = {}
+        self.window = window
+
+    def timeout(self, kind: str) -> float:
+        samples = sorted(self.samples.get(kind, ()))
+        if len(samples) < 3:
+            return self.max_seconds
+        p90 = samples[min(len(samples) - 1, int(len(samples) * 0.9))]
+        return max(self.min_seconds, min(self.max_seconds, p90 * 2))
+
+    def record(self, kind: str, seconds: float) -> None:
+        self.samples.setdefault(kind, deque(maxlen=self.window)).append(seconds)
+
+
+timeouts = AdaptiveTimeout()
+
+
+def build_chrome_options(headless: bool = CHROME_HEADLESS) -> Options:
+    options = Options()
+    for flag in CHROME_FLAGS:
+        options.add_argument(flag)
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    # Network events in the performance log are where bytes transferred come from
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return options
+
+
+def enable_resource_blocking(driver, patterns: List[str] = BLOCKED_URL_PATTERNS) -> None:
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+    print(f"DEBUG: Blocking {len(patterns)} resource patterns (images, media, fonts, trackers).")
+
+
+def _drain_network_log(driver) -> Dict[str, int]:
+    """Sum the performance log since the last call: bytes received, finished and blocked requests."""
+    stats = {'bytes': 0, 'requests': 0, 'blocked': 0}
+    try:
+        entries = driver.get_log('performance')
+    except WebDriverException:
+        return stats
+    for entry in entries:
+        message = json.loads(entry['message'])['message']
+        if message['method'] == 'Network.loadingFinished':
+            stats['bytes'] += int(message['params'].get('encodedDataLength', 0))
+            stats['requests'] += 1
+        elif message['method'] == 'Network.loadingFailed' and message['params'].get('blockedReason'):
+            stats['blocked'] += 1
+    return stats
+
+
+def wait_for_any(driver, locators: List[Tuple[str, str]], kind: str) -> bool:
+    """Wait until any locator is present, using the adaptive timeout for this kind of page."""
+    timeout = timeouts.timeout(kind)
+    start = time.perf_counter()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            EC.any_of(*[EC.presence_of_element_located(loc) for loc in locators])
+        )
+    except TimeoutException:
+        timeouts.record(kind, timeout)
+        print(f"DEBUG: No {kind} element after {timeout:.1f}s (adaptive timeout).")
+        return False
+    elapsed = time.perf_counter() - start
+    timeouts.record(kind, elapsed)
+    print(f"DEBUG: {kind} ready in {elapsed:.2f}s (timeout {timeout:.1f}s).")
+    return True
+
+
+def wait_for_network_idle(driver, kind: str, idle_ms: int = NETWORK_IDLE_MS) -> bool:
+    """Wait for document.readyState == complete and no new resource entries for idle_ms."""
+    timeout = timeouts.timeout(kind)
+    start = time.perf_counter()
+    last_count = -1
+    last_change = start
+    while time.perf_counter() - start < timeout:
+        state, count = driver.execute_script(
+            "return [document.readyState, performance.getEntriesByType('resource').length];"
+        )
+        now = time.perf_counter()
+        if count != last_count:
+            last_count, last_change = count, now
+        elif state == 'complete' and (now - last_change) * 1000 >= idle_ms:
+            timeouts.record(kind, now - start)
+            return True
+        time.sleep(0.05)
+    timeouts.record(kind, timeout)
+    print(f"DEBUG: Network not idle after {timeout:.1f}s for {kind}.")
+    return False
+
+
+def navigate(driver, url: str, ready_locators: List[Tuple[str, str]], kind: str,
+             settle: Callable[[Any], None] | None = None) -> Dict[str, Any]:
+    """Load url and wait on concrete DOM signals instead of fixed sleeps. Returns per-page stats.
+
+    settle(driver) runs before the page is recorded, e.g. to scroll and wait for lazy-loaded content.
+    """
+    _drain_network_log(driver)
+    start = time.perf_counter()
+    driver.get(url)
+    ready = wait_for_any(driver, ready_locators, kind) if ready_locators else True
+    if settle:
+        settle(driver)
+    return record_page(driver, url, kind, start, ready)
+
+
+def record_page(driver, url: str, kind: str, start: float, ready: bool) -> Dict[str, Any]:
+    network = _drain_network_log(driver)
+    stats = {
+        'url': url,
+        'kind': kind,
+        'ready': ready,
+        'wall_ms': round((time.perf_counter() - start) * 1000, 1),
+        'bytes': network['bytes'],
+        'requests': network['requests'],
+        'blocked_requests': network['blocked']
+    }
+    _page_stats.append(stats)
+    print(f"DEBUG: Page {kind}: {stats['wall_ms']}ms, {stats['bytes']} bytes in {stats['requests']} requests, "
+          f"{stats['blocked_requests']} blocked.")
+    return stats
+
+
+def recent_page_stats() -> List[Dict[str, Any]]:
+    return list(_page_stats)
@@ -1,68 +1,98 @@
 import os
 import re
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Callable
 from dotenv import load_dotenv
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 from bs4 import BeautifulSoup
 import time
+import weakref
 import requests
 import difflib
 
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.database import init_db, save_candidates
+from app.nodes.navigation import (
+    CHROME_HEADLESS, BLOCK_RESOURCES, build_chrome_options, enable_resource_blocking,
+    navigate, wait_for_any, wait_for_network_idle, record_page
+)
+from app.nodes.embeddings import keyword_similarities, semantic_keyword_points, index_candidates
+from app.nodes.search_cache import (
+    CACHE_MODES, SEARCH_CACHE_TTL_SECONDS, SearchCacheMiss,
+    load_cached_search, store_cached_search, update_cached_profiles
+)
 
 load_dotenv()
 EMAIL = os.getenv('LINKEDIN_EMAIL')
 PASSWORD = os.getenv('LINKEDIN_PASSWORD')
+# Overridable so searches can run against a local stub serving recorded pages
+LINKEDIN_BASE_URL = os.getenv('LINKEDIN_BASE_URL', 'https://www.linkedin.com').rstrip('/')
+# Bump when parse_search_results changes so cached pages get re-parsed instead of re-scraped
+PARSER_VERSION = 2
 _driver = None
+# Every session this process started, so a watchdog can kill them (fan-out pools included)
+_live_drivers = weakref.WeakSet()
 
 def save_debug_html(driver, filename='debug.html'):
     with open(filename, 'w', encoding='utf-8') as f:
         f.write(driver.page_source)
     print(f"DEBUG: Saved page source to '{filename}'.")
 
-def init_driver():
-    global _driver
-    if _driver:
-        return _driver
-    options = Options()
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
+def create_driver(headless: bool = CHROME_HEADLESS, block_resources: bool = BLOCK_RESOURCES):
+    """Start a Chrome session and log it into LinkedIn."""
+    options = build_chrome_options(headless)
     service = Service(ChromeDriverManager().install())
-    _driver = webdriver.Chrome(service=service, options=options)
-    _driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-    _driver.get("https://www.linkedin.com/login")
-    wait = WebDriverWait(_driver, 15)
-    email_field = wait.until(EC.presence_of_element_located((By.ID, "username")))
+    driver = webdriver.Chrome(service=service, options=options)
+    _live_drivers.add(driver)
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    if block_resources:
+        enable_resource_blocking(driver)
+    login_url = f"{LINKEDIN_BASE_URL}/login"
+    if not navigate(driver, login_url, [(By.ID, "username")], 'login')['ready']:
+        driver.quit()
+        raise TimeoutException("Login form did not load")
+    email_field = driver.find_element(By.ID, "username")
     email_field.clear()
     email_field.send_keys(EMAIL)
-    pw_field = _driver.find_element(By.ID, "password")
+    pw_field = driver.find_element(By.ID, "password")
     pw_field.clear()
     pw_field.send_keys(PASSWORD)
-    login_btn = _driver.find_element(By.XPATH, "//button[@type='submit']")
+    login_btn = driver.find_element(By.XPATH, "//button[@type='submit']")
+    # Submitting is a click rather than a page load, so it is timed and recorded here
+    start = time.perf_counter()
     login_btn.click()
-    try:
-        WebDriverWait(_driver, 15).until(
-            EC.presence_of_element_located((By.ID, "global-nav-search"))
-        )
-    except TimeoutException:
+    if not wait_for_any(driver, [(By.ID, "global-nav-search")], 'login_submit'):
         print("Login failed or requires captcha. Please verify credentials or manually solve captcha.")
+        driver.quit()
+        raise TimeoutException("Login did not reach the feed")
+    wait_for_network_idle(driver, 'login_idle')
+    record_page(driver, driver.current_url, 'login_submit', start, True)
+    return driver
+
+def init_driver():
+    global _driver
+    if _driver:
+        return _driver
+    _driver = create_driver()
+    return _driver
+
+def close_driver():
+    global _driver
+    if _driver:
         _driver.quit()
         _driver = None
-        raise
-    time.sleep(3)
-    return _driver
+
+def quit_all_drivers():
+    """Quit every browser session started by this process; pending WebDriver calls on them fail."""
+    for driver in list(_live_drivers):
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"DEBUG: Error quitting browser session: {e}")
 
 def get_country_from_location(location: str) -> str | None:
     if not location or location == 'n/a':
@@ -80,7 +110,10 @@ def get_country_from_location(location: str) -> str | None:
         print(f"DEBUG: Geocoding failed for '{location}': {e} (using fuzzy fallback)")
         return None
 
-def calculate_relevance_score(profile_data: Dict[str, Any], config: Dict[str, Any], full_description: str = '') -> Tuple[float, Dict[str, int]]:
+def contains_term(term: str, text: str) -> bool:
+    return re.search(r'(?<!\w)' + re.escape(term) + r'(?!\w)', text) is not None
+
+def calculate_relevance_score(profile_data: Dict[str, Any], config: Dict[str, Any], full_description: str = '', semantic_similarity: float | None = None) -> Tuple[float, Dict[str, int]]:
     headline = profile_data.get('headline', '').lower()
     scraped_location = profile_data.get('location', 'n/a').lower()
     scraped_company = profile_data.get('current_company', '').lower()
@@ -94,14 +127,19 @@ def calculate_relevance_score(profile_data: Dict[str, Any], config: Dict[str, An
     breakdown = {'keywords': 0, 'location': 0, 'company': 0, 'experience': 0}
 
     keyword_words = base_keywords.split()
-    if base_keywords in desc_for_match:
-        score += 50
-        breakdown['keywords'] = 50
+    kw_pts = 0
+    if contains_term(base_keywords, desc_for_match):
+        kw_pts = 50
         print(f"DEBUG: Keywords full match in desc: '{base_keywords}'")
-    elif any(word in desc_for_match for word in keyword_words):
-        score += 25
-        breakdown['keywords'] = 25
+    elif any(contains_term(word, desc_for_match) for word in keyword_words):
+        kw_pts = 25
         print(f"DEBUG: Keywords partial match in desc: some words from '{base_keywords}'")
+    semantic_pts = semantic_keyword_points(semantic_similarity)
+    if semantic_pts > kw_pts:
+        kw_pts = semantic_pts
+        print(f"DEBUG: Keywords semantic match: similarity {semantic_similarity:.2f} → {semantic_pts}")
+    score += kw_pts
+    breakdown['keywords'] = kw_pts
 
     loc_pts = 0
     if not location_filter:
@@ -197,56 +235,11 @@ def estimate_experience(headline: str, card_text: str, min_exp: int) -> int:
         return max(10, min_exp)
     return min_exp if min_exp > 0 else 3
 
-def search_linkedin(config: Dict[str, Any]) -> List[Dict[str, Any]]:
-    init_db()
-    driver = init_driver()
+def parse_search_results(page_source: str, config: Dict[str, Any]) -> List[Dict[str, Any]]:
     base_keywords = ' '.join(config.get('keywords', ['AI Engineer']))
-    location = config.get('location', '').strip().lower()
-    company = config.get('company', '').strip().lower()
     min_exp = config.get('min_exp', 0)
 
-    query_parts = [f'"{base_keywords}"']
-    if location:
-        query_parts.append(f'AND "{config["location"]}"')
-    if company:
-        query_parts.append(f'AND "{config["company"]}"')
-    if min_exp > 0:
-        exp_phrase = f'("{min_exp} years experience" OR "{min_exp}+ years")'
-        query_parts.append(f'AND {exp_phrase}')
-    full_query = ' '.join(query_parts)
-    print(f"DEBUG: Built boolean query: '{full_query}' (base: '{base_keywords}', loc: '{location}', company: '{company}', min_exp: {min_exp})")
-
-    base_url = "https://www.linkedin.com/search/results/people/"
-    params = f"?keywords={full_query.replace(' ', '%20')}&origin=SWITCH_SEARCH_VERTICAL"
-    search_url = base_url + params
-    print(f"DEBUG: Navigating to boolean search URL: {search_url}")
-    driver.get(search_url)
-    print(f"DEBUG: Search page loaded - URL: {driver.current_url}, Title: {driver.title}")
-    save_debug_html(driver, 'debug_post_boolean_search.html')
-
-    wait = WebDriverWait(driver, 30)
-    cards_loaded = False
-    try:
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "li.reusable-search__result-container")))
-        print("DEBUG: Initial profile cards loaded.")
-        cards_loaded = True
-    except TimeoutException:
-        print("DEBUG: Timeout on updated cards - trying fallback.")
-        try:
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "ul[role='list'] li")))
-            print("DEBUG: Fallback cards loaded.")
-            cards_loaded = True
-        except TimeoutException:
-            print("DEBUG: No cards loaded - partial page or empty results. Try relaxing terms.")
-
-    driver.execute_script("window.scrollTo(0, document.body.scrollHeight / 2);")
-    time.sleep(5)
-    with open('debug_linkedin_search.html', 'w', encoding='utf-8') as f:
-        f.write(driver.page_source)
-    print("DEBUG: Saved final search HTML.")
-    print(f"DEBUG: Final URL: {driver.current_url}")
-
-    soup = BeautifulSoup(driver.page_source, 'html.parser')
+    soup = BeautifulSoup(page_source, 'html.parser')
     profile_cards = soup.select('ul[role="list"] li')[:3]
     if len(profile_cards) == 0:
         profile_cards = soup.select('li[class*="search-result"], li.reusable-search__result-container, ul.search-results__list li')[:3]
@@ -257,8 +250,7 @@ def search_linkedin(config: Dict[str, Any]) -> List[Dict[str, Any]]:
         card_text = card.get_text()[:200] + "..." if len(card.get_text()) > 200 else card.get_text()
         print(f"DEBUG: Card {i+1} sample text: '{card_text}'")
 
-    profiles = []
-    keyword_lower = base_keywords.lower()
+    parsed = []
     for i, card in enumerate(profile_cards):
         try:
             name_elem = card.select_one('a[href*="/in/"] span[dir="ltr"]')
@@ -306,41 +298,141 @@ def search_linkedin(config: Dict[str, Any]) -> List[Dict[str, Any]]:
 
             exp_years = estimate_experience(headline, card_text, min_exp)
 
-            temp_data = {
-                'headline': headline,
-                'location': scraped_location.lower(),
-                'current_company': scraped_company,
-                'experience_years': exp_years
-            }
-
-            relevance_score, score_breakdown = calculate_relevance_score(temp_data, config, full_description)
-            print(f"DEBUG: Candidate {i+1} ({name}) relevance score: {relevance_score}/100")
-
             linkedin_id_raw = profile_url.split('/in/')[-1].split('/')[0] if '/in/' in profile_url else f'candidate_{i+1}'
             linkedin_id = linkedin_id_raw.split('?')[0]
 
-            profiles.append({
+            parsed.append({
                 'id': linkedin_id,
                 'name': name,
-                'skills': [base_keywords],
+                'headline': headline,
                 'experience_years': exp_years,
                 'location': scraped_location,
                 'current_company': scraped_company,
                 'profile_url': profile_url,
-                'relevance_score': relevance_score,
-                'score_breakdown': score_breakdown
+                'full_description': full_description
             })
         except Exception as e:
             print(f"DEBUG: Error processing card {i+1}: {e}")
             if 't14_divs' in locals():
                 print(f"DEBUG: Available t-14 divs: {[d.get_text(strip=True)[:50] for d in t14_divs]}")
 
+    # One batched embedding pass for the whole page instead of one model call per card
+    similarities = keyword_similarities(base_keywords.lower(), [p['full_description'] for p in parsed])
+
+    profiles = []
+    for i, (entry, similarity) in enumerate(zip(parsed, similarities)):
+        temp_data = {
+            'headline': entry['headline'],
+            'location': entry['location'].lower(),
+            'current_company': entry['current_company'],
+            'experience_years': entry['experience_years']
+        }
+
+        relevance_score, score_breakdown = calculate_relevance_score(temp_data, config, entry['full_description'], similarity)
+        print(f"DEBUG: Candidate {i+1} ({entry['name']}) relevance score: {relevance_score}/100")
+
+        profiles.append({
+            'id': entry['id'],
+            'name': entry['name'],
+            'skills': [base_keywords],
+            'experience_years': entry['experience_years'],
+            'location': entry['location'],
+            'current_company': entry['current_company'],
+            'profile_url': entry['profile_url'],
+            'relevance_score': relevance_score,
+            'score_breakdown': score_breakdown
+        })
+
     print(f"DEBUG: Total candidates added to pool (with scores): {len(profiles)}")
 
     profiles.sort(key=lambda x: x['relevance_score'], reverse=True)
+    index_candidates({entry['id']: entry['full_description'] for entry in parsed})
+    return profiles
+
+def build_search_url(config: Dict[str, Any]) -> str:
+    base_keywords = ' '.join(config.get('keywords', ['AI Engineer']))
+    location = config.get('location', '').strip().lower()
+    company = config.get('company', '').strip().lower()
+    min_exp = config.get('min_exp', 0)
+
+    query_parts = [f'"{base_keywords}"']
+    if location:
+        query_parts.append(f'AND "{config["location"]}"')
+    if company:
+        query_parts.append(f'AND "{config["company"]}"')
+    if min_exp > 0:
+        exp_phrase = f'("{min_exp} years experience" OR "{min_exp}+ years")'
+        query_parts.append(f'AND {exp_phrase}')
+    full_query = ' '.join(query_parts)
+    print(f"DEBUG: Built boolean query: '{full_query}' (base: '{base_keywords}', loc: '{location}', company: '{company}', min_exp: {min_exp})")
 
-    saved = save_candidates(profiles)
-    print(f"DEBUG: Saved {saved} new candidates to database.")
+    base_url = f"{LINKEDIN_BASE_URL}/search/results/people/"
+    params = f"?keywords={full_query.replace(' ', '%20')}&origin=SWITCH_SEARCH_VERTICAL"
+    return base_url + params
 
-    driver.quit()
+def search_from_cache(config: Dict[str, Any], max_age_seconds: int | None = SEARCH_CACHE_TTL_SECONDS) -> List[Dict[str, Any]] | None:
+    cached = load_cached_search(config, max_age_seconds)
+    if cached is None:
+        return None
+    if cached['parser_version'] == PARSER_VERSION:
+        return cached['profiles']
+    print(f"DEBUG: Cached profiles from parser v{cached['parser_version']}, re-parsing stored HTML with v{PARSER_VERSION}.")
+    profiles = parse_search_results(cached['html'], config)
+    update_cached_profiles(cached['cache_key'], profiles, PARSER_VERSION)
     return profiles
+
+def fetch_search_page(driver, search_url: str, debug_tag: str = '') -> str:
+    """Load a search results URL in an already logged-in session and return the rendered HTML."""
+    suffix = f"_{debug_tag}" if debug_tag else ''
+    print(f"DEBUG: Navigating to boolean search URL: {search_url}")
+
+    def settle(driver):
+        print(f"DEBUG: Search page loaded - URL: {driver.current_url}, Title: {driver.title}")
+        save_debug_html(driver, f'debug_post_boolean_search{suffix}.html')
+        # Lazy-loaded cards render on scroll; wait for the requests it triggers to settle
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight / 2);")
+        wait_for_network_idle(driver, 'search_scroll')
+
+    page = navigate(driver, search_url, [
+        (By.CSS_SELECTOR, "li.reusable-search__result-container"),
+        (By.CSS_SELECTOR, "ul[role='list'] li")
+    ], 'search', settle=settle)
+    if not page['ready']:
+        print("DEBUG: No cards loaded - partial page or empty results. Try relaxing terms.")
+    save_debug_html(driver, f'debug_linkedin_search{suffix}.html')
+    print(f"DEBUG: Final URL: {driver.current_url}")
+    return driver.page_source
+
+def run_search(config: Dict[str, Any], fetch_page: Callable[[str], str], cache_mode: str = 'auto',
+               save: bool = True) -> List[Dict[str, Any]]:
+    """Resolve one search config through the cache, falling back to fetch_page(search_url) for the HTML.
+
+    cache_mode: 'auto' serves a fresh cached page if present, 'only' never fetches (any cached age is
+    accepted), 'refresh' always fetches and overwrites the cache.
+    save=False leaves persisting the profiles to the caller, e.g. fan-out saves only the merged ranking.
+    """
+    if cache_mode not in CACHE_MODES:
+        raise ValueError(f"Unknown cache mode '{cache_mode}', expected one of {CACHE_MODES}")
+    profiles = None
+    if cache_mode != 'refresh':
+        profiles = search_from_cache(config, None if cache_mode == 'only' else SEARCH_CACHE_TTL_SECONDS)
+        if profiles is None and cache_mode == 'only':
+            raise SearchCacheMiss("No cached results for this search")
+
+    if profiles is None:
+        search_url = build_search_url(config)
+        page_source = fetch_page(search_url)
+        profiles = parse_search_results(page_source, config)
+        store_cached_search(config, search_url, page_source, profiles, PARSER_VERSION)
+
+    if save:
+        saved = save_candidates(profiles)
+        print(f"DEBUG: Saved {saved} new candidates to database.")
+    return profiles
+
+def search_linkedin(config: Dict[str, Any], cache_mode: str = 'auto', save: bool = True) -> List[Dict[str, Any]]:
+    init_db()
+    try:
+        return run_search(config, lambda url: fetch_search_page(init_driver(), url), cache_mode, save)
+    finally:
+        close_driver()
@@ -0,0 +1,75 @@
+# Result-page cache for LinkedIn searches, keyed by the normalized search config
+import os
+import json
+import hashlib
+import zlib
+from datetime import datetime
+from typing import List, Dict, Any
+from dotenv import load_dotenv
+
+from app.database import (
+    get_search_cache, save_search_cache, update_search_cache_profiles, evict_search_cache
+)
+
+load_dotenv()
+
+SEARCH_CACHE_TTL_SECONDS = int(os.getenv('SEARCH_CACHE_TTL_SECONDS', str(6 * 3600)))
+SEARCH_CACHE_MAX_MB = float(os.getenv('SEARCH_CACHE_MAX_MB', '50'))
+CACHE_MODES = ('auto', 'only', 'refresh')
+
+
+class SearchCacheMiss(LookupError):
+    pass
+
+
+def normalize_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields that change the boolean query or the scoring, with whitespace and case folded."""
+    return {
+        'keywords': [' '.join(k.lower().split()) for k in config.get('keywords', ['AI Engineer']) if k.strip()],
+        'location': ' '.join(config.get('location', '').lower().split()),
+        'company': ' '.join(config.get('company', '').lower().split()),
+        'min_exp': int(config.get('min_exp', 0) or 0),
+        'max_results': int(config.get('max_results', 10) or 10)
+    }
+
+
+def search_cache_key(config: Dict[str, Any]) -> str:
+    payload = json.dumps(normalize_config(config), sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load_cached_search(config: Dict[str, Any], max_age_seconds: int | None = SEARCH_CACHE_TTL_SECONDS) -> Dict[str, Any] | None:
+    """Return the cached page for this config as {'html', 'profiles', 'parser_version', ...}, or None.
+
+    Entries older than max_age_seconds are treated as misses; pass None to accept any age.
+    """
+    key = search_cache_key(config)
+    row = get_search_cache(key)
+    if not row:
+        print(f"DEBUG: Search cache miss for key {key[:12]}.")
+        return None
+    created = datetime.fromisoformat(row['created_date']) if isinstance(row['created_date'], str) else row['created_date']
+    age = (datetime.now() - created).total_seconds()
+    if max_age_seconds is not None and age > max_age_seconds:
+        print(f"DEBUG: Search cache entry {key[:12]} expired ({age:.0f}s old).")
+        return None
+    print(f"DEBUG: Search cache hit for key {key[:12]} ({age:.0f}s old).")
+    return {
+        'cache_key': key,
+        'search_url': row['search_url'],
+        'html': zlib.decompress(row['html']).decode('utf-8'),
+        'profiles': json.loads(row['profiles']),
+        'parser_version': row['parser_version']
+    }
+
+
+def store_cached_search(config: Dict[str, Any], search_url: str, html: str, profiles: List[Dict[str, Any]], parser_version: int) -> None:
+    key = search_cache_key(config)
+    compressed = zlib.compress(html.encode('utf-8'), 6)
+    save_search_cache(key, search_url, compressed, json.dumps(profiles), parser_version)
+    evicted = evict_search_cache(int(SEARCH_CACHE_MAX_MB * 1024 * 1024))
+    print(f"DEBUG: Cached search page {key[:12]} ({len(html)} → {len(compressed)} bytes), evicted {evicted}.")
+
+
+def update_cached_profiles(cache_key: str, profiles: List[Dict[str, Any]], parser_version: int) -> None:
+    update_search_cache_profiles(cache_key, json.dumps(profiles), parser_version)
@@ -0,0 +1,6 @@
+# Backfill funnel_stats from the messages history: python -m app.rebuild_stats
+from app.database import rebuild_funnel_stats
+
+if __name__ == "__main__":
+    rows = rebuild_funnel_stats()
+    print(f"Rebuilt funnel_stats: {rows} rows.")
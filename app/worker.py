@@ -0,0 +1,141 @@
+# Standalone scraper worker: python -m app.worker
+# Pulls search jobs from the SQLite queue, runs the browser automation and writes profiles back.
+# Start as many as you like; every worker (on any node sharing the DB file) leases jobs independently.
+import argparse
+import json
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from dotenv import load_dotenv
+
+from app.database import (
+    init_db, save_candidates, lease_search_job, extend_search_job_lease, finish_search_job, heartbeat_worker, remove_worker
+)
+from app.nodes.search import search_linkedin, quit_all_drivers
+from app.nodes.fanout import fanout_search
+from app.nodes.search_cache import SearchCacheMiss
+from app.nodes.embeddings import semantic_enabled, get_model
+
+load_dotenv()
+
+WORKER_POLL_SECONDS = float(os.getenv('WORKER_POLL_SECONDS', '1.0'))
+WORKER_HEARTBEAT_SECONDS = float(os.getenv('WORKER_HEARTBEAT_SECONDS', '10'))
+WORKER_LEASE_SECONDS = float(os.getenv('WORKER_LEASE_SECONDS', '120'))
+WORKER_MAX_ATTEMPTS = int(os.getenv('WORKER_MAX_ATTEMPTS', '3'))
+WORKER_JOB_TIMEOUT_SECONDS = float(os.getenv('WORKER_JOB_TIMEOUT_SECONDS', '600'))
+
+
+class Worker:
+    def __init__(self, worker_id: str | None = None):
+        self.hostname = socket.gethostname()
+        self.pid = os.getpid()
+        self.worker_id = worker_id or f"{self.hostname}-{self.pid}-{uuid.uuid4().hex[:6]}"
+        self.current_job: int | None = None
+        self.job_started = 0.0
+        self.timed_out = False
+        self._stop = threading.Event()
+
+    def _heartbeat_loop(self):
+        # Keeps the worker visible in /workers and the current lease alive while a long scrape runs
+        while not self._stop.wait(WORKER_HEARTBEAT_SECONDS):
+            try:
+                heartbeat_worker(self.worker_id, self.hostname, self.pid, self.current_job)
+                if self.current_job is not None:
+                    self._check_job(self.current_job)
+            except Exception as e:
+                print(f"DEBUG: Worker {self.worker_id} heartbeat failed: {e}")
+
+    def _check_job(self, job_id: int):
+        """Extend the lease only while the job is within WORKER_JOB_TIMEOUT_SECONDS.
+
+        Past it the lease is left to expire so another worker can take the job (counting the
+        attempt), and the browser sessions are killed to unblock the hung scrape. If even that
+        doesn't return control within a lease period, the process exits.
+        """
+        elapsed = time.monotonic() - self.job_started
+        if elapsed <= WORKER_JOB_TIMEOUT_SECONDS:
+            extend_search_job_lease(job_id, self.worker_id, WORKER_LEASE_SECONDS)
+        elif not self.timed_out:
+            self.timed_out = True
+            print(f"DEBUG: Job {job_id} exceeded {WORKER_JOB_TIMEOUT_SECONDS:.0f}s, killing its browser sessions.")
+            quit_all_drivers()
+        elif elapsed > WORKER_JOB_TIMEOUT_SECONDS + WORKER_LEASE_SECONDS:
+            print(f"DEBUG: Job {job_id} still hung, exiting worker {self.worker_id}.")
+            remove_worker(self.worker_id)
+            os._exit(1)
+
+    def execute(self, job):
+        config = json.loads(job['config'])
+        # Profiles are saved once, by process(), so saved_to_db counts the new candidates
+        if config.get('fan_out'):
+            return fanout_search(config, cache_mode=job['cache_mode'], save=False)
+        return {'profiles': search_linkedin(config, cache_mode=job['cache_mode'], save=False), 'failed_queries': []}
+
+    def process(self, job):
+        self.job_started = time.monotonic()
+        self.timed_out = False
+        self.current_job = job['id']
+        heartbeat_worker(self.worker_id, self.hostname, self.pid, self.current_job)
+        print(f"DEBUG: Worker {self.worker_id} leased job {job['id']} (attempt {job['attempts']}).")
+        try:
+            result = self.execute(job)
+            # Saved here rather than by /search, so jobs nobody is waiting on still land in the DB
+            result['saved_to_db'] = save_candidates(result['profiles'])
+            finish_search_job(job['id'], self.worker_id, 'done', result=json.dumps(result))
+            print(f"DEBUG: Job {job['id']} done with {len(result['profiles'])} profiles.")
+        except SearchCacheMiss as e:
+            finish_search_job(job['id'], self.worker_id, 'cache_miss', error=str(e))
+        except KeyboardInterrupt:
+            # Stopping mid-job: hand it back now instead of waiting for the lease to expire
+            finish_search_job(job['id'], self.worker_id, 'queued', error="Worker stopped during the search")
+            raise
+        except Exception as e:
+            if self.timed_out:
+                e = TimeoutError(f"Job exceeded WORKER_JOB_TIMEOUT_SECONDS ({WORKER_JOB_TIMEOUT_SECONDS:.0f}s): {e}")
+            retry = job['attempts'] < WORKER_MAX_ATTEMPTS
+            finish_search_job(job['id'], self.worker_id, 'queued' if retry else 'failed', error=str(e))
+            print(f"DEBUG: Job {job['id']} failed: {e} ({'requeued' if retry else 'giving up'}).")
+        finally:
+            self.current_job = None
+
+    def _handle_sigterm(self, signum, frame):
+        # Same path as Ctrl+C, so browser sessions are closed and the worker deregisters
+        self._stop.set()
+        raise KeyboardInterrupt
+
+    def run(self, once: bool = False):
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self._handle_sigterm)
+        init_db()
+        if semantic_enabled():
+            # Load the embedding model before the first job so it isn't paid inside a page's scoring budget
+            get_model()
+        heartbeat_worker(self.worker_id, self.hostname, self.pid, None)
+        threading.Thread(target=self._heartbeat_loop, daemon=True).start()
+        print(f"Worker {self.worker_id} polling for search jobs.")
+        try:
+            while not self._stop.is_set():
+                job = lease_search_job(self.worker_id, WORKER_LEASE_SECONDS, WORKER_MAX_ATTEMPTS)
+                if job is None:
+                    if once:
+                        break
+                    self._stop.wait(WORKER_POLL_SECONDS)
+                    continue
+                self.process(job)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop.set()
+            remove_worker(self.worker_id)
+            print(f"Worker {self.worker_id} stopped.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a LinkedIn scraper worker.")
+    parser.add_argument('--worker-id', default=None)
+    parser.add_argument('--once', action='store_true', help="exit when the queue is empty")
+    args = parser.parse_args()
+    Worker(args.worker_id).run(once=args.once)
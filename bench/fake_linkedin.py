@@ -0,0 +1,105 @@
+# Local stand-in for LinkedIn and the OpenAI chat API, serving recorded pages and canned completions
+import json
+import os
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+MOCK_MESSAGE = (
+    "Hi {name}, your work on production ML systems stood out to us. "
+    "We are building computer vision pipelines and think your background would be a great fit. "
+    "Please reply if interested in discussing this opportunity further."
+)
+
+
+def load_fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+        return f.read()
+
+
+class FakeLinkedInHandler(BaseHTTPRequestHandler):
+    pages = {
+        '/login': 'login.html',
+        '/feed/': 'feed.html',
+        '/search/results/people/': 'search_results.html'
+    }
+    # Stand-ins for avatars and web fonts, so resource blocking has something to save
+    static_sizes = {'.png': ('image/png', 48 * 1024), '.woff2': ('font/woff2', 96 * 1024)}
+    llm_latency_ms = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = 'text/html; charset=utf-8'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path.startswith('/static/'):
+            content_type, size = self.static_sizes.get(os.path.splitext(path)[1], ('application/octet-stream', 1024))
+            self._send(200, b'\0' * size, content_type)
+            return
+        fixture = self.pages.get(path)
+        if fixture is None:
+            self._send(404, b'Not found', 'text/plain')
+            return
+        self._send(200, load_fixture(fixture))
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length) if length else b''
+        if path == '/checkpoint/lg/login-submit':
+            self.send_response(302)
+            self.send_header('Location', '/feed/')
+            self.end_headers()
+        elif path == '/v1/chat/completions':
+            self._chat_completion(body)
+        else:
+            self._send(404, b'Not found', 'text/plain')
+
+    def _chat_completion(self, body: bytes):
+        if self.llm_latency_ms:
+            time.sleep(self.llm_latency_ms / 1000)
+        prompt = json.loads(body or b'{}').get('messages', [{}])[-1].get('content', '')
+        # The generator prompt contains "Candidate: <name>, ..."
+        name = prompt.split('Candidate:', 1)[-1].split(',', 1)[0].strip() if 'Candidate:' in prompt else 'there'
+        payload = {
+            'id': 'chatcmpl-bench',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': 'gpt-3.5-turbo',
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': MOCK_MESSAGE.format(name=name)},
+                'finish_reason': 'stop'
+            }],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+        }
+        self._send(200, json.dumps(payload).encode('utf-8'), 'application/json')
+
+
+def start_fake_server(host: str = '127.0.0.1', port: int = 0, llm_latency_ms: int = 0) -> ThreadingHTTPServer:
+    """Serve in a daemon thread; port 0 picks a free port (see server.server_address)."""
+    handler = type('BenchHandler', (FakeLinkedInHandler,), {'llm_latency_ms': llm_latency_ms})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    server = start_fake_server(port=int(os.getenv('FAKE_LINKEDIN_PORT', '8765')))
+    host, port = server.server_address
+    print(f"Fake LinkedIn/OpenAI server on http://{host}:{port} (LINKEDIN_BASE_URL, OPENAI_BASE_URL=http://{host}:{port}/v1)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,59 @@
+# Per-page wall time and bytes for the Selenium navigation path, with and without resource blocking.
+# python -m bench.navigation --pages 10 --output bench_navigation.json
+import argparse
+import json
+import os
+import statistics
+from datetime import datetime
+
+from bench.fake_linkedin import start_fake_server
+from bench.run import percentile
+
+
+def run_mode(pages: int, block_resources: bool, headless: bool) -> dict:
+    from app.nodes import navigation, search
+    search.EMAIL, search.PASSWORD = 'bench@example.com', 'bench'
+    navigation._page_stats.clear()
+    driver = search.create_driver(headless=headless, block_resources=block_resources)
+    try:
+        for _ in range(pages):
+            search.fetch_search_page(driver, search.build_search_url({'keywords': ['AI Engineer']}), debug_tag='bench')
+    finally:
+        driver.quit()
+    search_pages = [s for s in navigation.recent_page_stats() if s['kind'] == 'search']
+    return {
+        'block_resources': block_resources,
+        'pages': len(search_pages),
+        'mean_wall_ms': round(statistics.mean(s['wall_ms'] for s in search_pages), 1),
+        'p90_wall_ms': round(percentile(sorted(s['wall_ms'] for s in search_pages), 90), 1),
+        'mean_bytes': round(statistics.mean(s['bytes'] for s in search_pages)),
+        'mean_requests': round(statistics.mean(s['requests'] for s in search_pages), 1),
+        'mean_blocked_requests': round(statistics.mean(s['blocked_requests'] for s in search_pages), 1),
+        'pages_detail': search_pages
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure navigation cost on fixture pages.")
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--headed', action='store_true', help="show the browser window")
+    parser.add_argument('--output', default='bench_navigation.json')
+    args = parser.parse_args()
+
+    fake = start_fake_server()
+    # search.py reads LINKEDIN_BASE_URL at import time
+    os.environ['LINKEDIN_BASE_URL'] = f'http://127.0.0.1:{fake.server_address[1]}'
+    results = [run_mode(args.pages, block, not args.headed) for block in (False, True)]
+    fake.shutdown()
+
+    for r in results:
+        print(f"blocking={'on ' if r['block_resources'] else 'off'}  mean {r['mean_wall_ms']:>8.1f}ms  "
+              f"p90 {r['p90_wall_ms']:>8.1f}ms  {r['mean_bytes']:>9} bytes  {r['mean_requests']:>5} requests  "
+              f"{r['mean_blocked_requests']:>5} blocked")
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'generated_at': datetime.now().isoformat(), 'runs': results}, f, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
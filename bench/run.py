@@ -0,0 +1,180 @@
+# End-to-end API benchmark against a synthetic DB, a fake LinkedIn and a mock LLM.
+# python -m bench.run --rows 100000 --concurrency 8 --requests 200 --output bench_report.json
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from bench.fake_linkedin import start_fake_server
+from bench.synth_db import build_synthetic_db
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ('metrics', 'export-report', 'generate', 'search')
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_api(port: int, env: dict, log_path: str) -> subprocess.Popen:
+    # Logs go to a file: the API prints a lot of DEBUG output and a full pipe would stall it
+    log = open(log_path, 'w', encoding='utf-8')
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning'],
+        cwd=REPO_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"API exited during startup, see {log_path}")
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/openapi.json', timeout=2).read()
+            return proc
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.25)
+    proc.kill()
+    raise RuntimeError("API did not start within 120s")
+
+
+def start_worker(env: dict, log_path: str) -> subprocess.Popen:
+    log = open(log_path, 'w', encoding='utf-8')
+    return subprocess.Popen([sys.executable, '-m', 'app.worker'], cwd=REPO_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def request_factory(endpoint: str, base_url: str, search_cache: str):
+    def call(i: int):
+        if endpoint == 'metrics':
+            req = urllib.request.Request(f'{base_url}/metrics')
+        elif endpoint == 'export-report':
+            req = urllib.request.Request(f'{base_url}/export-report')
+        elif endpoint == 'generate':
+            body = {'id': f'bench-gen-{i}', 'name': f'Bench Candidate {i}', 'experience': 'ML engineer',
+                    'current_company': 'google'}
+            req = urllib.request.Request(f'{base_url}/generate', data=json.dumps(body).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'}, method='POST')
+        else:
+            body = {'keywords': ['AI Engineer'], 'max_results': 10}
+            req = urllib.request.Request(f'{base_url}/search?cache={search_cache}', data=json.dumps(body).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'}, method='POST')
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=300) as resp:
+                size = len(resp.read())
+                status = resp.status
+        except urllib.error.HTTPError as e:
+            size, status = 0, e.code
+        except Exception:
+            size, status = 0, 0
+        return (time.perf_counter() - start) * 1000, status, size
+    return call
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def run_endpoint(endpoint: str, base_url: str, requests: int, concurrency: int, search_cache: str) -> dict:
+    call = request_factory(endpoint, base_url, search_cache)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(requests)))
+    wall = time.perf_counter() - start
+    latencies = sorted(r[0] for r in results)
+    errors = sum(1 for r in results if not 200 <= r[1] < 300)
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': errors,
+        'status_codes': {str(code): sum(1 for r in results if r[1] == code) for code in sorted({r[1] for r in results})},
+        'mean_ms': round(statistics.mean(latencies), 2) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p90_ms': round(percentile(latencies, 90), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(latencies[-1], 2) if latencies else 0.0,
+        'throughput_rps': round(requests / wall, 2) if wall > 0 else 0.0,
+        'avg_response_bytes': round(statistics.mean(r[2] for r in results)) if results else 0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API offline against local stubs.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000], help="synthetic DB sizes to run (e.g. 10000 100000 1000000)")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=100, help="requests per endpoint")
+    parser.add_argument('--search-requests', type=int, default=3, help="/search drives a real browser, so it gets fewer requests")
+    parser.add_argument('--search-workers', type=int, default=1, help="scraper worker processes to start for /search")
+    parser.add_argument('--search-cache', choices=('auto', 'only', 'refresh'), default='refresh')
+    parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument('--llm-latency-ms', type=int, default=0, help="artificial delay for mock completions")
+    parser.add_argument('--workdir', default=None, help="where synthetic DBs are written (default: temp dir)")
+    parser.add_argument('--output', default='bench_report.json')
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='linkedin-bench-')
+    fake = start_fake_server(llm_latency_ms=args.llm_latency_ms)
+    fake_url = f'http://127.0.0.1:{fake.server_address[1]}'
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'runs': []
+    }
+
+    for rows in args.rows:
+        db_path = os.path.join(workdir, f'bench_{rows}.db')
+        build_seconds = build_synthetic_db(db_path, rows)
+        print(f"Built synthetic DB with {rows} rows in {build_seconds:.1f}s ({db_path})")
+
+        port = free_port()
+        env = {
+            **os.environ,
+            'DB_PATH': db_path,
+            'LINKEDIN_BASE_URL': fake_url,
+            'LINKEDIN_EMAIL': 'bench@example.com',
+            'LINKEDIN_PASSWORD': 'bench',
+            'USE_OPENAI': 'true',
+            'OPENAI_API_KEY': 'bench',
+            'OPENAI_BASE_URL': f'{fake_url}/v1'
+        }
+        api = start_api(port, env, os.path.join(workdir, f'api_{rows}.log'))
+        # /search is executed by scraper workers, one browser session each
+        workers = [
+            start_worker(env, os.path.join(workdir, f'worker_{rows}_{i}.log'))
+            for i in range(args.search_workers if 'search' in args.endpoints else 0)
+        ]
+        run = {'rows': rows, 'db_build_seconds': round(build_seconds, 2), 'endpoints': {}}
+        try:
+            for endpoint in args.endpoints:
+                count = args.search_requests if endpoint == 'search' else args.requests
+                stats = run_endpoint(endpoint, f'http://127.0.0.1:{port}', count, args.concurrency, args.search_cache)
+                run['endpoints'][endpoint] = stats
+                print(f"  {rows:>8} rows /{endpoint:<14} p50 {stats['p50_ms']:>9.1f}ms  p90 {stats['p90_ms']:>9.1f}ms  "
+                      f"p99 {stats['p99_ms']:>9.1f}ms  {stats['throughput_rps']:>8.1f} req/s  errors {stats['errors']}")
+        finally:
+            for proc in [api] + workers:
+                proc.terminate()
+                proc.wait(timeout=30)
+        report['runs'].append(run)
+
+    fake.shutdown()
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
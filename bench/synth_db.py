@@ -0,0 +1,69 @@
+# Synthetic candidates/messages database for benchmarks: python -m bench.synth_db bench.db --rows 100000
+import argparse
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+COMPANIES = ['google', 'meta', 'amazon', 'microsoft', 'openai', 'nvidia', 'deepmind', 'startup', 'n/a']
+SKILLS = ['AI Engineer', 'ML Engineer', 'Machine Learning Engineer', 'Computer Vision Engineer', 'Data Scientist']
+CHUNK = 50_000
+
+
+def build_synthetic_db(path: str, rows: int, seed: int = 42) -> float:
+    """Create `rows` candidates and `rows` messages (~60% sent, ~20% replied). Returns build seconds."""
+    if os.path.exists(path):
+        os.remove(path)
+    # database.py reads DB_PATH at import time
+    os.environ['DB_PATH'] = path
+    from app import database
+    database.DB_PATH = path
+    database.init_db()
+
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    now = datetime.now()
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    for offset in range(0, rows, CHUNK):
+        count = min(CHUNK, rows - offset)
+        candidates = []
+        messages = []
+        for i in range(offset, offset + count):
+            linkedin_id = f'bench-{i}'
+            company = rng.choice(COMPANIES)
+            candidates.append((linkedin_id, f'https://www.linkedin.com/in/{linkedin_id}', f'Candidate {i}',
+                               rng.choice(SKILLS), round(rng.uniform(20, 100), 1), company))
+            created = now - timedelta(days=rng.randint(0, 180), seconds=rng.randint(0, 86400))
+            sent = created + timedelta(hours=rng.randint(1, 48)) if rng.random() < 0.6 else None
+            replied = sent + timedelta(hours=rng.randint(1, 240)) if sent and rng.random() < 0.33 else None
+            status = 'replied' if replied else 'sent' if sent else 'generated'
+            campaign_id = rng.randint(1, 5) if rng.random() < 0.5 else None
+            messages.append((linkedin_id, f'Candidate {i}', company, f'Hi Candidate {i}, synthetic outreach message.',
+                             sent, 'Interested' if replied else None, replied, status, campaign_id, created))
+        cursor.executemany(
+            """INSERT OR IGNORE INTO candidates (linkedin_id, profile_url, name, skills, relevance_score, current_company)
+            VALUES (?, ?, ?, ?, ?, ?)""",
+            candidates
+        )
+        cursor.executemany(
+            """INSERT INTO messages (candidate_id, candidate_name, current_company, message, sent_date, response,
+            response_date, status, campaign_id, created_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            messages
+        )
+        conn.commit()
+    conn.close()
+    database.rebuild_funnel_stats()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a synthetic benchmark database.")
+    parser.add_argument('path')
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    elapsed = build_synthetic_db(args.path, args.rows, args.seed)
+    print(f"Built {args.path} with {args.rows} candidates/messages in {elapsed:.1f}s.")
@@ -1,7 +1,10 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 
 const API_BASE = 'http://localhost:8000';
+const SEARCH_POLL_MS = 3000;
+// Give up polling a queued search after this long (e.g. no worker is running)
+const SEARCH_MAX_WAIT_MS = 10 * 60 * 1000;
 
 const SearchModule = () => {
   const [config, setConfig] = useState({
@@ -14,6 +17,10 @@ const SearchModule = () => {
   const [results, setResults] = useState([]);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
+  const [jobStatus, setJobStatus] = useState(null);
+  const mounted = useRef(true);
+
+  useEffect(() => () => { mounted.current = false; }, []);
 
   useEffect(() => {
     const fetchCandidates = async () => {
@@ -27,6 +34,23 @@ const SearchModule = () => {
     fetchCandidates();
   }, []);
 
+  // A 202 means no worker finished the job in time; poll it until it does, we give up, or the page unmounts
+  const waitForSearchJob = async (jobId) => {
+    const deadline = Date.now() + SEARCH_MAX_WAIT_MS;
+    while (Date.now() < deadline) {
+      await new Promise((resolve) => setTimeout(resolve, SEARCH_POLL_MS));
+      if (!mounted.current) return null;
+      const res = await axios.get(`${API_BASE}/search-jobs/${jobId}`);
+      const { status, error: jobError } = res.data;
+      if (status === 'done') return res.data;
+      if (status === 'failed' || status === 'cache_miss') {
+        return { error: status === 'cache_miss' ? jobError : `Search failed: ${jobError}` };
+      }
+      if (mounted.current) setJobStatus(res.data);
+    }
+    return { error: `Search job ${jobId} is still queued. Is a worker running (python -m app.worker)? Check /search-jobs/${jobId} later.` };
+  };
+
   const handleSearch = async () => {
     setLoading(true);
     setError('');
@@ -35,7 +59,13 @@ const SearchModule = () => {
         ...config,
         keywords: config.keywords.split(' ').filter(Boolean)
       };
-      const res = await axios.post(`${API_BASE}/search`, configData);
+      let res = await axios.post(`${API_BASE}/search`, configData);
+      if (res.status === 202) {
+        setJobStatus(res.data);
+        const jobResult = await waitForSearchJob(res.data.job_id);
+        if (!jobResult) return;
+        res = { data: jobResult };
+      }
       if (res.data.error) {
         setError(res.data.error);
       } else {
@@ -46,10 +76,19 @@ const SearchModule = () => {
     } catch (err) {
       setError('Search failed: ' + err.response?.data?.detail || err.message + '. Check console/backend logs.');
     } finally {
-      setLoading(false);
+      if (mounted.current) {
+        setLoading(false);
+        setJobStatus(null);
+      }
     }
   };
 
+  const searchProgressLabel = () => {
+    if (!jobStatus) return 'Searching LinkedIn...';
+    if (jobStatus.status === 'leased') return `Searching LinkedIn (worker ${jobStatus.worker_id}, attempt ${jobStatus.attempts})...`;
+    return `Job ${jobStatus.job_id} queued, waiting for a worker...`;
+  };
+
   const handleConfigChange = (e) => {
     const { name, value } = e.target;
     setConfig({ ...config, [name]: name === 'min_exp' ? parseInt(value) || 0 : value });
@@ -122,7 +161,7 @@ const SearchModule = () => {
           marginBottom: 20 
         }}
       >
-        {loading ? 'Searching LinkedIn...' : 'Start Search 🔍'}
+        {loading ? searchProgressLabel() : 'Start Search 🔍'}
       </button>
       
       {error && <p style={{ color: '#dc3545', marginBottom: 20, padding: 10, backgroundColor: '#f8d7da', borderRadius: 6, border: '1px solid #f5c6cb' }}>{error}</p>}